@@ -0,0 +1,71 @@
+import os
+from pathlib import Path
+
+REQUEST_TIMEOUT = 30
+PERFORMER_SEARCH_TIMEOUT = 20
+PERFORMER_SEARCH_LIMIT = 50  # best matches returned by performerByName, None for all of them
+# BeautifulSoup parser, None to use lxml when installed and html.parser otherwise
+HTML_PARSER = None
+
+# detail pages (e.g. performers of a gallery) fetched in parallel
+MAX_WORKERS = 8
+# maximum number of in-flight requests per host, "default" applies to unlisted hosts
+HOST_CONCURRENCY = {
+    "default": 4,
+    "v2ph.com": 2,
+    "xchina.co": 2,
+    "api.e-hentai.org": 1,  # the API asks for sequential requests
+}
+# (requests per second, burst) per host, "default" applies to unlisted hosts.
+# Shared by all scraper processes through the files in RATE_LIMIT_DIR
+RATE_LIMIT = {
+    "default": (4.0, 8),
+    "v2ph.com": (1.0, 4),
+    "xchina.co": (1.0, 4),
+    # the API allows a few requests in a row before a pause: up to 4, then one every 2 seconds
+    "api.e-hentai.org": (0.5, 4),
+}
+# proxy per host, "default" applies to unlisted hosts: "system" for the proxy of the environment/OS settings,
+# a proxy URL such as "http://127.0.0.1:7890", or None to connect directly
+PROXIES = {
+    "default": "system",
+}
+# HTTP/2 for the hosts below, needs httpx[http2]. Sites behind Cloudflare always use cloudscraper over HTTP/1.1
+HTTP2 = False
+HTTP2_HOSTS = ["galleryepic.com", "misskon.com", "e-hentai.org"]
+KEEPALIVE_EXPIRY = 30  # seconds an idle HTTP/2 connection is kept open
+# retries of 429/5xx responses and connection errors, backing off exponentially from RETRY_BACKOFF seconds
+# unless the site sends Retry-After
+MAX_RETRIES = 3
+RETRY_BACKOFF = 1.0
+RETRY_MAX_DELAY = 60
+
+# on-disk cache of HTTP responses, shared between scraper runs
+CACHE_ENABLED = True
+CACHE_DIR = Path.home() / ".cache" / "stash-scrapers"
+CACHE_MAX_SIZE = 512 * 1024 * 1024  # bytes
+# seconds a cached response is used without revalidation, "default" applies to unlisted hosts
+CACHE_TTL = {
+    "default": 24 * 60 * 60,
+    "e-hentai.org": 7 * 24 * 60 * 60,
+    "misskon.com": 7 * 24 * 60 * 60,
+}
+# parsed performers, shared with JavDBScraper through CACHE_DIR
+PERFORMER_TTL = 7 * 24 * 60 * 60
+PERFORMER_NOT_FOUND_TTL = 24 * 60 * 60  # seconds a performer page that answered 404 is not fetched again
+
+# Cloudflare clearance cookies of the cloudscraper sites, reused across runs until they expire
+CLEARANCE_DIR = CACHE_DIR / "clearance"
+RATE_LIMIT_DIR = CACHE_DIR / "ratelimit"
+
+# "record" saves every response to FIXTURE_DIR, "replay" answers requests from it instead of the live sites
+REPLAY_MODE = os.environ.get("SCRAPER_REPLAY_MODE", "")
+FIXTURE_DIR = Path(os.environ.get("SCRAPER_FIXTURE_DIR", CACHE_DIR / "fixtures"))
+
+# unix socket of the resident scraper process started with `python main.py serve`
+DAEMON_SOCKET = CACHE_DIR / "gallery-scraper.sock"
+DAEMON_TIMEOUT = 300  # seconds to wait for the resident process to answer
+
+# E-Hentai metadata API, and whether to add the torrent download links of galleries that have torrents
+EHENTAI_API_URL = "https://api.e-hentai.org/api.php"
+EHENTAI_TORRENTS = True
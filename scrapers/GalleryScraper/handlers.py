@@ -0,0 +1,109 @@
+import asyncio
+import sys
+from functools import cache
+from typing import Any, Callable, Literal
+from urllib.parse import urlsplit
+
+from config import PERFORMER_SEARCH_TIMEOUT, PERFORMER_SEARCH_LIMIT
+from py_common import log
+from py_common.deps import ensure_requirements
+from py_common.types import ScrapedPerformer, PerformerSearchResult, ScrapedGallery
+from scrapers import GalleryEpic, V2PH, XChina, MissKon, EHentai, BaseGalleryScraper
+from utils import rank_names
+
+ensure_requirements("bs4:beautifulsoup4", "requests", "cloudscraper")
+
+all_scrapers = [
+    GalleryEpic, V2PH, XChina, MissKon, EHentai
+]
+
+
+@cache
+def get_scraper(scraper_cls: type[BaseGalleryScraper]) -> BaseGalleryScraper:
+    """Scraper instances are reused, so a resident daemon keeps their warmed sessions alive."""
+    return scraper_cls()
+
+
+def performer_by_url(url_info: dict[Literal["url"], str]) -> ScrapedPerformer:
+    if not url_info.get("url"):
+        log.error("No URL provided")
+        sys.exit(-1)
+
+    domain = urlsplit(url_info["url"]).netloc.lower()
+
+    for scraper_cls in all_scrapers:
+        if domain in scraper_cls.domain:
+            scraper = get_scraper(scraper_cls)
+            return scraper.performer(url_info["url"])
+    else:
+        log.error(f"No scraper found for domain: {domain}\n")
+        sys.exit(-1)
+
+
+async def performer_by_name(name_info: dict[Literal["name"], str]) -> list[PerformerSearchResult]:
+    if not name_info.get("name"):
+        log.error("No name provided")
+        sys.exit(-1)
+
+    tasks = [
+        get_scraper(scraper_cls).search_performers(name_info, timeout=PERFORMER_SEARCH_TIMEOUT)
+        for scraper_cls in all_scrapers
+    ]
+    resp = await asyncio.gather(*tasks)
+    result: list[PerformerSearchResult] = [item for sub in resp for item in sub]
+    return rank_names(name_info["name"], result, key=lambda p: p.get("name", ""), limit=PERFORMER_SEARCH_LIMIT)
+
+
+def gallery_by_url(url_info: dict[Literal["url"], str]):
+    if not url_info.get("url"):
+        log.error("No URL provided")
+        sys.exit(-1)
+
+    domain = urlsplit(url_info["url"]).netloc.lower()
+
+    for scraper_cls in all_scrapers:
+        if domain in scraper_cls.domain:
+            scraper = get_scraper(scraper_cls)
+            return scraper.parse_gallery_by_url(url_info)
+    else:
+        log.error(f"No scraper found for domain: {domain}\n")
+        sys.exit(-1)
+
+
+def galleries_by_url(urls_info: dict[Literal["urls"], list[str]]) -> list[ScrapedGallery | None]:
+    """
+    Scrape many galleries at once, e.g. to re-scrape a library. Sites with a bulk API fetch them in few requests.
+    Returns the galleries in the order of `urls`, None for the ones that failed.
+    """
+    if not urls_info.get("urls"):
+        log.error("No URLs provided")
+        sys.exit(-1)
+
+    by_scraper: dict[type[BaseGalleryScraper], list[int]] = {}
+    galleries: list[ScrapedGallery | None] = [None] * len(urls_info["urls"])
+    for i, url in enumerate(urls_info["urls"]):
+        domain = urlsplit(url).netloc.lower()
+        scraper_cls = next((cls for cls in all_scrapers if domain in cls.domain), None)
+        if scraper_cls is None:
+            log.error(f"No scraper found for domain: {domain}")
+            continue
+        by_scraper.setdefault(scraper_cls, []).append(i)
+
+    for scraper_cls, indices in by_scraper.items():
+        infos = [{"url": urls_info["urls"][i]} for i in indices]
+        try:
+            scraped = get_scraper(scraper_cls).parse_galleries_by_url(infos)
+        except (Exception, SystemExit) as e:  # the galleries of the other sites are still returned
+            log.error(f"Failed to scrape {len(infos)} {scraper_cls.__name__} galleries: {e!r}")
+            continue
+        for i, gallery in zip(indices, scraped):
+            galleries[i] = gallery
+    return galleries
+
+
+MODES: dict[str, Callable[[dict], Any]] = {
+    "performerByURL": performer_by_url,
+    "performerByName": lambda info: asyncio.run(performer_by_name(info)),
+    "galleryByURL": gallery_by_url,
+    "galleriesByURL": galleries_by_url,
+}
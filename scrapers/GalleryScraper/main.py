@@ -1,75 +1,30 @@
-import asyncio
 import json
 import sys
-from typing import Literal
-from urllib.parse import urlsplit
 
+from config import DAEMON_SOCKET, DAEMON_TIMEOUT
 from py_common import log
-from py_common.deps import ensure_requirements
-from py_common.types import ScrapedPerformer, PerformerSearchResult
-from scrapers import GalleryEpic, V2PH, XChina, MissKon, EHentai
-from utils import jaccard_similarity
-
-ensure_requirements("bs4:beautifulsoup4", "requests", "cloudscraper")
-
-all_scrapers = [
-    GalleryEpic, V2PH, XChina, MissKon, EHentai
-]
-
-
-def performer_by_url(url_info: dict[Literal["url"], str]) -> ScrapedPerformer:
-    if not url_info.get("url"):
-        log.error("No URL provided")
-        sys.exit(-1)
-
-    domain = urlsplit(url_info["url"]).netloc.lower()
-
-    for scraper_cls in all_scrapers:
-        if domain in scraper_cls.domain:
-            scraper = scraper_cls()
-            return scraper.parse_performer_by_url(url_info)
-    else:
-        log.error(f"No scraper found for domain: {domain}\n")
-        sys.exit(-1)
-
-
-async def performer_by_name(name_info: dict[Literal["name"], str]) -> list[PerformerSearchResult]:
-    if not name_info.get("name"):
-        log.error("No name provided")
-        sys.exit(-1)
-
-    tasks = [
-        scraper_cls().parse_performer_by_name(name_info)
-        for scraper_cls in all_scrapers
-    ]
-    resp = await asyncio.gather(*tasks)
-    result: list[PerformerSearchResult] = [item for sub in resp for item in sub]
-    result.sort(key=lambda p: jaccard_similarity(p.get("name", ""), name_info.get("name")), reverse=True)
-    return result
-
-
-def gallery_by_url(url_info: dict[Literal["url"], str]):
-    if not url_info.get("url"):
-        log.error("No URL provided")
-        sys.exit(-1)
-
-    domain = urlsplit(url_info["url"]).netloc.lower()
-
-    for scraper_cls in all_scrapers:
-        if domain in scraper_cls.domain:
-            scraper = scraper_cls()
-            return scraper.parse_gallery_by_url(url_info)
-    else:
-        log.error(f"No scraper found for domain: {domain}\n")
-        sys.exit(-1)
-
+from scraper_common.daemon import forward, serve, DaemonUnavailable, DaemonError
 
 if __name__ == "__main__":
-    info = json.loads(sys.stdin.read())
+    if sys.argv[1] == "serve":
+        from handlers import MODES
+        serve(DAEMON_SOCKET, MODES)
+        sys.exit(0)
 
-    if sys.argv[1] == "performerByURL":
-        print(json.dumps(performer_by_url(info), ensure_ascii=False))
-    elif sys.argv[1] == "performerByName":
-        print(json.dumps(asyncio.run(performer_by_name(info)), ensure_ascii=False))
-    elif sys.argv[1] == "galleryByURL":
-        print(json.dumps(gallery_by_url(info), ensure_ascii=False))
+    info = json.loads(sys.stdin.read())
+    try:
+        result = forward(DAEMON_SOCKET, DAEMON_TIMEOUT, sys.argv[1], info)
+    except DaemonUnavailable:
+        # no resident process, scrape in this process
+        from handlers import MODES
+        from scraper_common.retry import FetchError
+        from scrapers import ParseError
+        try:
+            result = MODES[sys.argv[1]](info)
+        except (FetchError, ParseError) as e:
+            log.error(str(e))
+            sys.exit(-1)
+    except DaemonError as e:
+        log.error(str(e))
+        sys.exit(-1)
+    print(json.dumps(result, ensure_ascii=False))
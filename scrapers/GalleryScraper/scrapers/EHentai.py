@@ -1,12 +1,17 @@
-from typing import Literal
+import html
+from typing import Literal, Optional
 from urllib.parse import urlsplit, urljoin
 
-from bs4 import BeautifulSoup, Tag
+from bs4 import SoupStrainer, Tag
 
+from config import EHENTAI_API_URL, EHENTAI_TORRENTS
 from py_common import log as log
 from py_common.types import ScrapedPerformer, PerformerSearchResult, ScrapedGallery, ScrapedTag
+from utils import make_soup, parallel_map, parse_only
 from .base import BaseGalleryScraper
 
+GDATA_BATCH = 25  # the most galleries the API returns per request
+
 
 class EHentai(BaseGalleryScraper):
     domain = ["e-hentai.org"]
@@ -34,9 +39,99 @@ class EHentai(BaseGalleryScraper):
         log.warning("EHentai does not support performer search")
         return []
 
+    @staticmethod
+    def gallery_key(url: str) -> tuple[int, str]:
+        """The gallery ID and token in a `/g/<gid>/<token>/` URL."""
+        gid, token = urlsplit(url).path.replace("/g/", "").split("/")[:2]
+        return int(gid), token
+
+    def gdata(self, keys: list[tuple[int, str]]) -> dict[int, dict]:
+        """Fetch the metadata of many galleries from the API, `GDATA_BATCH` per request, by gallery ID."""
+        metadata: dict[int, dict] = {}
+        for i in range(0, len(keys), GDATA_BATCH):
+            resp = self.fetch(
+                "post",
+                url=EHENTAI_API_URL,
+                json={"method": "gdata", "gidlist": [list(key) for key in keys[i:i + GDATA_BATCH]], "namespace": 1}
+            )
+            for entry in resp.json().get("gmetadata", []):
+                metadata[int(entry["gid"])] = entry
+        return metadata
+
+    def torrent_urls(self, gid: int, token: str) -> list[str]:
+        download_page = urljoin(self.base_url, "gallerytorrents.php?gid={}&t={}".format(gid, token))
+        download_resp = self.fetch("get", url=download_page, headers={'accept-language': 'zh-CN,zh;q=0.9'})
+        download_soup = make_soup(download_resp.content, SoupStrainer("form"))
+        download_form_elem = download_soup.select_one("form")
+        return [elem["href"] for elem in download_form_elem.select("a")] if download_form_elem else []
+
+    def gallery(self, info: dict[Literal["url"], str], entry: Optional[dict]) -> ScrapedGallery:
+        """Build the gallery from its API metadata, scraping the gallery page if the API had none."""
+        if entry is None or "error" in entry:
+            reason = entry["error"] if entry else "no metadata"
+            log.warning(f"E-Hentai API failed for {info.get('url')} ({reason}), scraping the page")
+            return self.parse_gallery_page(info)
+
+        tags: list[ScrapedTag] = []
+        performers: list[ScrapedPerformer] = []
+        urls: list[str] = [info.get("url")]
+        for tag in entry.get("tags", []):
+            namespace, _, name = html.unescape(tag).rpartition(":")
+            if namespace in ("parody", "character", "female", "other"):
+                tags.append(ScrapedTag(name=name))
+            elif namespace in ("cosplayer", "artist"):
+                performers.append(ScrapedPerformer(
+                    name=name,
+                    urls=[urljoin(self.base_url, f"/tag/{namespace}:{name.replace(' ', '+')}")]
+                ))
+        # the torrent page is only fetched if the gallery has torrents
+        if EHENTAI_TORRENTS and int(entry.get("torrentcount") or 0) > 0:
+            urls.extend(self.torrent_urls(entry["gid"], entry["token"]))
+
+        return ScrapedGallery(
+            title=html.unescape(entry.get("title", "")),
+            tags=tags,
+            urls=urls,
+            performers=performers
+        )
+
     def parse_gallery_by_url(self, info: dict[Literal["url"], str]) -> ScrapedGallery:
+        gid, token = self.gallery_key(info.get("url"))
+        return self.gallery(info, self.gdata([(gid, token)]).get(gid))
+
+    def parse_galleries_by_url(self, infos: list[dict[Literal["url"], str]]) -> list[ScrapedGallery | None]:
+        """
+        Scrape many galleries with one API request per `GDATA_BATCH` galleries.
+        If the API fails, every gallery falls back to scraping its page.
+        """
+        keys: list[tuple[int, str] | None] = []
+        for info in infos:
+            try:
+                keys.append(self.gallery_key(info.get("url", "")))
+            except ValueError:
+                log.error(f"Failed to scrape {info.get('url')}: not a gallery URL")
+                keys.append(None)
+        try:
+            metadata = self.gdata(list(dict.fromkeys(key for key in keys if key)))
+        except Exception as e:
+            log.warning(f"E-Hentai API failed ({e}), scraping the gallery pages")
+            metadata = {}
+
+        def scrape(i: int) -> ScrapedGallery | None:
+            if keys[i] is None:
+                return None
+            try:
+                return self.gallery(infos[i], metadata.get(keys[i][0]))
+            except Exception as e:
+                log.error(f"Failed to scrape {infos[i].get('url')}: {e}")
+                return None
+
+        return parallel_map(scrape, range(len(infos)))
+
+    def parse_gallery_page(self, info: dict[Literal["url"], str]) -> ScrapedGallery:
+        """Scrape the gallery page itself, for galleries the API has no metadata of."""
         resp = self.fetch("get", url=info.get("url"), headers={'accept-language': 'zh-CN,zh;q=0.9'})
-        soup = BeautifulSoup(resp.content, "html.parser")
+        soup = make_soup(resp.content, parse_only("#gn", "#taglist"))
 
         title_elem = soup.select_one("h1#gn")
         title = title_elem.text.strip() if title_elem else ""
@@ -62,15 +157,8 @@ class EHentai(BaseGalleryScraper):
                         ) for tag in info_map[k]
                     ])
         # parse download urls
-        base_path = urlsplit(info.get("url")).path
-        [gid, t] = base_path.replace("/g/", "").split("/")[:2]
-        download_page = urljoin(self.base_url, "gallerytorrents.php?gid={}&t={}".format(gid, t))
-        download_resp = self.fetch("get", url=download_page, headers={'accept-language': 'zh-CN,zh;q=0.9'})
-        download_soup = BeautifulSoup(download_resp.content, "html.parser")
-        download_form_elem = download_soup.select_one("form")
-        if download_form_elem:
-            for elem in download_form_elem.select("a"):
-                urls.append(elem["href"])
+        if EHENTAI_TORRENTS:
+            urls.extend(self.torrent_urls(*self.gallery_key(info.get("url"))))
 
         return ScrapedGallery(
             title=title,
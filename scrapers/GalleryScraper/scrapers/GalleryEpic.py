@@ -1,10 +1,8 @@
 from typing import Literal
 from urllib.parse import urljoin
 
-from bs4 import BeautifulSoup
-
 from py_common.types import ScrapedPerformer, PerformerSearchResult, ScrapedGallery
-from utils import jaccard_similarity
+from utils import make_soup, parallel_map, parse_only
 from .base import BaseGalleryScraper
 
 
@@ -16,7 +14,7 @@ class GalleryEpic(BaseGalleryScraper):
 
     def parse_performer_by_url(self, info: dict[Literal["url"], str]) -> ScrapedPerformer:
         resp = self.fetch("get", url=info.get("url"))
-        soup = BeautifulSoup(resp.content, "html.parser")
+        soup = make_soup(resp.content)
 
         name_elem = soup.select_one("h4.scroll-m-20.text-xl.font-semibold.tracking-tight")
         name = name_elem.text.strip() if name_elem else None
@@ -40,7 +38,7 @@ class GalleryEpic(BaseGalleryScraper):
     def parse_performer_by_name(self, info: dict[Literal["name"], str]) -> list[PerformerSearchResult]:
         name = info.get("name")
         resp = self.fetch("get", url=f"https://galleryepic.com/zh/cosers/1?coserName={name}")
-        soup = BeautifulSoup(resp.content, "html.parser")
+        soup = make_soup(resp.content, parse_only(".grid.grid-cols-2"))
 
         result_elem = soup.select_one("div.grid.grid-cols-2")
         if not result_elem:
@@ -54,13 +52,11 @@ class GalleryEpic(BaseGalleryScraper):
                 continue
             seen_urls.add(url)
             performers.append(PerformerSearchResult(url=url, name=url_elem.text.strip()))
-        performers.sort(key=lambda p: jaccard_similarity(p.get("name", ""), name), reverse=True)
-
         return performers
 
     def parse_gallery_by_url(self, info: dict[Literal["url"], str]) -> ScrapedGallery:
         resp = self.fetch("get", url=info.get("url"))
-        soup = BeautifulSoup(resp.content, "html.parser")
+        soup = make_soup(resp.content)
 
         info_elem = soup.select_one("div.w-full div.flex.justify-between.items-center")
         if info_elem:
@@ -72,16 +68,17 @@ class GalleryEpic(BaseGalleryScraper):
 
         breadcrumb_elem = soup.select_one("div.w-full > div.py-3")
         if breadcrumb_elem:
-            performers: list[ScrapedPerformer] = []
+            links: list[tuple[str, str]] = []
             for link_elem in breadcrumb_elem.select('a[href^="/zh/coser/"]'):
                 url = urljoin(self.base_url, link_elem['href'])
                 name = link_elem.text.strip()
                 if "album" in info.get("url"):
                     url = url.replace("/coser/", "/model/")  # Fix the wrong performer URL in album pages
-                performer = self.parse_performer_by_url({"url": url})
+                links.append((url, name))
+            performers: list[ScrapedPerformer] = parallel_map(self.performer, [url for url, _ in links])
+            for performer, (_, name) in zip(performers, links):
                 if not performer.get("name"):
                     performer["name"] = name
-                performers.append(performer)
         else:
             performers = []
 
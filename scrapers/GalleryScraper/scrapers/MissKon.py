@@ -1,10 +1,15 @@
 from typing import Literal
 from urllib.parse import urlparse, urljoin
-from bs4 import BeautifulSoup
 from py_common import log as log
 from py_common.types import ScrapedPerformer, PerformerSearchResult, ScrapedGallery, ScrapedStudio
+from utils import make_soup
 from .base import BaseGalleryScraper
 
+# fields of the REST API responses that are used, to keep the payloads small
+POST_FIELDS = "id,title,content,tags"
+TAG_FIELDS = "id,name,link"
+PAGE_SIZE = 100  # the largest `per_page` the WordPress REST API allows
+
 
 class MissKon(BaseGalleryScraper):
     domain = ["misskon.com"]
@@ -18,7 +23,7 @@ class MissKon(BaseGalleryScraper):
         :param info:
         :return:
         """
-        resp = self.fetch("get", url=info.get("url"))
+        resp = self.fetch("get", url=f"{info.get('url')}?_fields={TAG_FIELDS}")
         data: dict = resp.json()
 
         return ScrapedPerformer(
@@ -35,30 +40,95 @@ class MissKon(BaseGalleryScraper):
         log.warning("MissKon does not support performer search")
         return []
 
-    def parse_gallery_by_url(self, info: dict[Literal["url"], str]) -> ScrapedGallery:
-        url_path = urlparse(info.get("url")).path
-        post_id = url_path[1:].split("-")[0]
-        api_url = urljoin(self.base_url, f"/wp-json/wp/v2/posts/{post_id}")
-        resp = self.fetch("get", url=api_url)
-        data: dict = resp.json()
+    def fetch_many(self, endpoint: str, ids: list[str], fields: str) -> list[dict]:
+        """
+        Fetch the items with the given IDs from a collection endpoint such as `posts` or `tags`,
+        `PAGE_SIZE` of them per request.
+        """
+        items: list[dict] = []
+        for i in range(0, len(ids), PAGE_SIZE):
+            include = ",".join(ids[i:i + PAGE_SIZE])
+            resp = self.fetch(
+                "get",
+                url=urljoin(
+                    self.base_url, f"/wp-json/wp/v2/{endpoint}?include={include}&per_page={PAGE_SIZE}&_fields={fields}"
+                )
+            )
+            items.extend(resp.json())
+        return items
+
+    def tag_url(self, tag_id: int | str) -> str:
+        return urljoin(self.base_url, f"/wp-json/wp/v2/tags/{tag_id}")
 
-        urls = [info.get("url"), api_url]
+    def fetch_tags(self, urls: list[str]) -> dict[str, ScrapedPerformer]:
+        """Fetch the performers of many tag URLs at once."""
+        tags = self.fetch_many("tags", [url.rstrip("/").rsplit("/", 1)[-1] for url in urls], TAG_FIELDS)
+        return {
+            self.tag_url(tag["id"]): ScrapedPerformer(name=tag.get("name", ""), urls=[tag.get("link", "")])
+            for tag in tags
+        }
 
-        performers: list[ScrapedPerformer] = [
-            self.parse_performer_by_url({
-                "url": urljoin(self.base_url, f"/wp-json/wp/v2/tags/{performer_id}")
-            })
-            for performer_id in data.get("tags", [])
-        ]
+    def gallery(self, url: str, post: dict, performers: dict[str, ScrapedPerformer]) -> ScrapedGallery:
+        api_url = urljoin(self.base_url, f"/wp-json/wp/v2/posts/{post['id']}")
+        urls = [url, api_url]
 
-        content = data.get("content", {}).get("rendered", "")  # HTML
-        soup = BeautifulSoup(content, "html.parser")
+        content = post.get("content", {}).get("rendered", "")  # HTML
+        soup = make_soup(content)
         url_elems = soup.select("a.shortc-button")
         if url_elems:
             urls.extend([url_elem["href"] for url_elem in url_elems if url_elem.get("href")])
 
+        tag_urls = [self.tag_url(tag_id) for tag_id in post.get("tags", [])]
         return ScrapedGallery(
-            title=data.get("title", {}).get("rendered", ""),
+            title=post.get("title", {}).get("rendered", ""),
             urls=urls,
-            performers=performers
+            performers=[performers[tag_url] for tag_url in tag_urls if tag_url in performers]
         )
+
+    @staticmethod
+    def post_id(url: str) -> str:
+        return urlparse(url).path[1:].split("-")[0]
+
+    def parse_gallery_by_url(self, info: dict[Literal["url"], str]) -> ScrapedGallery:
+        api_url = urljoin(self.base_url, f"/wp-json/wp/v2/posts/{self.post_id(info.get('url'))}")
+        post: dict = self.fetch("get", url=f"{api_url}?_fields={POST_FIELDS}").json()
+        performers = self.performers([self.tag_url(tag_id) for tag_id in post.get("tags", [])], self.fetch_tags)
+        return self.gallery(info.get("url"), post, performers)
+
+    def parse_galleries_by_url(self, infos: list[dict[Literal["url"], str]]) -> list[ScrapedGallery | None]:
+        """
+        Scrape many posts with one request per `PAGE_SIZE` posts, and their tags with one request per `PAGE_SIZE`
+        tags not in the performer store yet. If a bulk request fails, the posts are scraped one by one instead.
+        """
+        galleries: list[ScrapedGallery | None] = [None] * len(infos)
+        post_ids: dict[int, str] = {}
+        for i, info in enumerate(infos):
+            post_id = self.post_id(info.get("url", ""))
+            if post_id.isdigit():  # anything else would fail the `include=` request of the whole batch
+                post_ids[i] = post_id
+            else:
+                log.error(f"Failed to scrape {info.get('url')}: not a post URL")
+
+        try:
+            posts = {
+                str(post["id"]): post
+                for post in self.fetch_many("posts", list(dict.fromkeys(post_ids.values())), POST_FIELDS)
+            }
+            tag_urls = {self.tag_url(tag_id): None for post in posts.values() for tag_id in post.get("tags", [])}
+            performers = self.performers(list(tag_urls), self.fetch_tags)
+        except Exception as e:
+            log.warning(f"MissKon bulk request failed ({e}), scraping the posts one by one")
+            indices = list(post_ids)
+            for i, gallery in zip(indices, super().parse_galleries_by_url([infos[i] for i in indices])):
+                galleries[i] = gallery
+            return galleries
+
+        for i, post_id in post_ids.items():
+            if post_id not in posts:
+                log.error(f"Failed to scrape {infos[i].get('url')}: post {post_id} not found")
+                continue
+            try:
+                galleries[i] = self.gallery(infos[i].get("url"), posts[post_id], performers)
+            except Exception as e:
+                log.error(f"Failed to scrape {infos[i].get('url')}: {e}")
+        return galleries
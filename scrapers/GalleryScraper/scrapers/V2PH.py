@@ -1,15 +1,12 @@
 import re
-import sys
 from typing import Literal
 from urllib.parse import urljoin
 
-from bs4 import BeautifulSoup
 from bs4.element import NavigableString, Tag
 
-from py_common import log
 from py_common.types import ScrapedPerformer, PerformerSearchResult, ScrapedGallery, ScrapedStudio
-from utils import jaccard_similarity
-from .base import BaseGalleryScraper
+from utils import make_soup, parallel_map, parse_only
+from .base import BaseGalleryScraper, ParseError
 
 
 class V2PH(BaseGalleryScraper):
@@ -20,12 +17,11 @@ class V2PH(BaseGalleryScraper):
 
     def parse_performer_by_url(self, info: dict[Literal["url"], str]) -> ScrapedPerformer:
         resp = self.fetch("get", url=info.get("url"), headers={'accept-language': 'zh-CN,zh;q=0.9'})
-        soup = BeautifulSoup(resp.content, "html.parser")
+        soup = make_soup(resp.content, parse_only(".row.card-body"))
 
         info_elem = soup.select_one("div.row.card-body")
         if not info_elem:
-            log.error("No performer info found")
-            sys.exit(-1)
+            raise ParseError(f"No performer info found at {info.get('url')}")
 
         name_elem = info_elem.select_one("h1")
         raw_name = name_elem.text.strip() if name_elem else ""
@@ -74,7 +70,7 @@ class V2PH(BaseGalleryScraper):
             url=f"https://www.v2ph.com/search/?q={name}",
             headers={'accept-language': 'zh-CN,zh;q=0.9'},
         )
-        soup = BeautifulSoup(resp.content, "html.parser")
+        soup = make_soup(resp.content, parse_only(".container.main-wrap"))
 
         result_elem = soup.select_one("div.container.main-wrap")
         if not result_elem:
@@ -88,18 +84,15 @@ class V2PH(BaseGalleryScraper):
                 continue
             seen_urls.add(url)
             performers.append(PerformerSearchResult(url=url, name=url_elem.text.strip()))
-        performers.sort(key=lambda p: jaccard_similarity(p.get("name", ""), name), reverse=True)
-
         return performers
 
     def parse_gallery_by_url(self, info: dict[Literal["url"], str]) -> ScrapedGallery:
         resp = self.fetch("get", url=info.get("url"), headers={'accept-language': 'zh-CN,zh;q=0.9'})
-        soup = BeautifulSoup(resp.content, "html.parser")
+        soup = make_soup(resp.content)
 
         info_elem = soup.select_one("div.container.main-wrap > div.card")
         if not info_elem:
-            log.error("No gallery info found")
-            sys.exit(-1)
+            raise ParseError(f"No gallery info found at {info.get('url')}")
 
         title_elem = info_elem.select_one("h1.h5.text-center")
         title = title_elem.text.strip() if title_elem else ""
@@ -112,10 +105,10 @@ class V2PH(BaseGalleryScraper):
             name=info_map["拍摄机构"].text.strip(),
             url=urljoin(self.base_url, info_map["拍摄机构"].find("a")['href'])
         ) if info_map.get("拍摄机构") else None
-        performers: list[ScrapedPerformer] = [
-            self.parse_performer_by_url({"url": urljoin(self.base_url, link_elem['href'])})
-            for link_elem in info_map["出镜模特"].find_all("a")
-        ] if info_map.get("出镜模特") else []
+        performers: list[ScrapedPerformer] = parallel_map(
+            self.performer,
+            [urljoin(self.base_url, link_elem['href']) for link_elem in info_map["出镜模特"].find_all("a")]
+        ) if info_map.get("出镜模特") else []
         date = info_map["发行日期"].text.strip() if info_map.get("发布日期") else None
         code = info_map["专辑编号"].text.strip() if info_map.get("专辑编号") else None
         tags = [
@@ -1,15 +1,11 @@
 import re
-import sys
 from datetime import datetime
 from typing import Literal
 from urllib.parse import urljoin
 
-from bs4 import BeautifulSoup
-
-from py_common import log
 from py_common.types import ScrapedPerformer, PerformerSearchResult, ScrapedGallery, ScrapedTag, ScrapedStudio
-from utils import jaccard_similarity
-from .base import BaseGalleryScraper
+from utils import make_soup, parallel_map, parse_only
+from .base import BaseGalleryScraper, ParseError
 
 
 class XChina(BaseGalleryScraper):
@@ -20,12 +16,11 @@ class XChina(BaseGalleryScraper):
 
     def parse_performer_by_url(self, info: dict[Literal["url"], str]) -> ScrapedPerformer:
         resp = self.fetch("get", url=info.get("url"), headers={'accept-language': 'zh-CN,zh;q=0.9'})
-        soup = BeautifulSoup(resp.content, "html.parser")
+        soup = make_soup(resp.content, parse_only(".content-box.object-card"))
 
         info_elem = soup.select_one("div.content-box.object-card")
         if not info_elem:
-            log.error("No performer info found")
-            sys.exit(-1)
+            raise ParseError(f"No performer info found at {info.get('url')}")
 
         name_container_elem = info_elem.select_one("div.title")
         name = name_container_elem.next.text.strip() if name_container_elem and name_container_elem.next else ""
@@ -87,11 +82,7 @@ class XChina(BaseGalleryScraper):
             url=f"https://xchina.co/models/keyword-{name}.html",
             headers={'accept-language': 'zh-CN,zh;q=0.9'}
         )
-        if resp.status_code != 200:
-            log.error("Failed to retrieve search results")
-            sys.exit(-1)
-
-        soup = BeautifulSoup(resp.content, "html.parser")
+        soup = make_soup(resp.content, parse_only(".list.model-list"))
 
         result_elem = soup.select_one("div.list.model-list")
         if not result_elem:
@@ -105,13 +96,11 @@ class XChina(BaseGalleryScraper):
                 continue
             seen_urls.add(url)
             performers.append(PerformerSearchResult(url=url, name=url_elem.text.strip()))
-        performers.sort(key=lambda p: jaccard_similarity(p.get("name", ""), name), reverse=True)
-
         return performers
 
     def parse_gallery_by_url(self, info: dict[Literal["url"], str]) -> ScrapedGallery:
         resp = self.fetch("get", url=info.get("url"), headers={'accept-language': 'zh-CN,zh;q=0.9'})
-        soup = BeautifulSoup(resp.content, "html.parser")
+        soup = make_soup(resp.content, parse_only(".hero-title-item", ".tab-contents"))
 
         title_elem = soup.select_one("h1.hero-title-item")
         title = title_elem.text.strip() if title_elem else ""
@@ -136,10 +125,10 @@ class XChina(BaseGalleryScraper):
                 studio = None
             # performers
             performers_elem = info_elem.select("div.model-item")
-            performers = [
-                self.parse_performer_by_url(info={"url": urljoin(self.base_url, p_elem.parent["href"])})
-                for p_elem in performers_elem
-            ]
+            performers = parallel_map(
+                self.performer,
+                [urljoin(self.base_url, p_elem.parent["href"]) for p_elem in performers_elem]
+            )
         else:
             tags = []
             studio = None
@@ -1,3 +1,4 @@
+from .base import BaseGalleryScraper, ParseError
 from .EHentai import EHentai
 from .GalleryEpic import GalleryEpic
 from .MissKon import MissKon
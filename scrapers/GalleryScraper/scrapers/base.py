@@ -1,13 +1,62 @@
-import sys
+import asyncio
+import json
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Sequence, Literal
-from urllib.request import getproxies
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from functools import cache
+from typing import Any, Callable, Optional, Sequence, Literal
 
 import cloudscraper
 import requests
 
+from config import REQUEST_TIMEOUT, CACHE_ENABLED, CACHE_DIR, CACHE_MAX_SIZE, CACHE_TTL, CLEARANCE_DIR, REPLAY_MODE, \
+    FIXTURE_DIR, PERFORMER_TTL, PERFORMER_NOT_FOUND_TTL, MAX_RETRIES, RETRY_BACKOFF, RETRY_MAX_DELAY, RATE_LIMIT, \
+    RATE_LIMIT_DIR, PROXIES
 from py_common import log
 from py_common.types import ScrapedPerformer, PerformerSearchResult, ScrapedGallery
+from scraper_common.cache import ResponseCache, cache_key
+from scraper_common.clearance import ClearanceStore
+from scraper_common.fixtures import FixtureStore
+from scraper_common.performers import PerformerStore
+from scraper_common.proxies import ProxyRouter, disable_trust_env
+from scraper_common.ratelimit import RateLimiter
+from scraper_common.retry import FetchError, send_with_retries
+from utils import host_semaphore, normalize_host, configure_session
+
+# shared by all scrapers, so that sites are queried concurrently instead of one after another
+executor = ThreadPoolExecutor(thread_name_prefix="gallery-scraper")
+# `time.monotonic()` at which the requests of the current thread give up, set while searching performers
+fetch_deadline: ContextVar[Optional[float]] = ContextVar("fetch_deadline", default=None)
+
+
+@cache
+def response_cache() -> ResponseCache:
+    return ResponseCache(CACHE_DIR / "gallery-http.sqlite", max_size=CACHE_MAX_SIZE)
+
+
+@cache
+def fixture_store() -> FixtureStore:
+    return FixtureStore(FIXTURE_DIR)
+
+
+@cache
+def performer_store() -> PerformerStore:
+    return PerformerStore(CACHE_DIR / "performers.sqlite", ttl=PERFORMER_TTL, negative_ttl=PERFORMER_NOT_FOUND_TTL)
+
+
+@cache
+def rate_limiter() -> RateLimiter:
+    return RateLimiter(RATE_LIMIT, RATE_LIMIT_DIR)
+
+
+@cache
+def proxy_router() -> ProxyRouter:
+    return ProxyRouter(PROXIES)
+
+
+class ParseError(Exception):
+    """A page that was fetched but does not contain what the scraper expects, e.g. after a site redesign."""
 
 
 class BaseGalleryScraper(ABC):
@@ -16,36 +65,183 @@ class BaseGalleryScraper(ABC):
     def __init__(self, base_url: str, http_client: Literal["requests", "cloudscraper"] = "requests"):
         self.base_url = base_url
 
+        self.clearance: ClearanceStore | None = None
         if http_client == "requests":
             self.client: requests.Session | cloudscraper.CloudScraper = requests.Session()
+            # cloudscraper keeps its own adapter and headers, they are part of passing the challenge
+            configure_session(self.client, self.domain)
         elif http_client == "cloudscraper":
             self.client: requests.Session | cloudscraper.CloudScraper = cloudscraper.create_scraper()
+            self.clearance = ClearanceStore(CLEARANCE_DIR, normalize_host(base_url))
+            self.clearance.load(self.client)
         else:
             raise ValueError(f"Unsupported instance type: {http_client}")
+        # proxies come from `proxy_router`, instead of requests reading the environment again on every request
+        disable_trust_env(self.client)
 
     @property
     def name(self) -> str:
         return self.__class__.__name__
 
-    @property
-    def proxies(self) -> dict:
-        return getproxies()
-
     def fetch(
             self,
             method: Literal["get", "post"],
             url: str,
             *args: Any,
+            cache: bool = True,
             **kwargs: Any
     ) -> requests.Response:
-        resp = self.client.request(
-            method=method, url=url, proxies=self.proxies, *args, **kwargs
+        """
+        Send a request, raising `FetchError` on any non-200 response.
+        Requests are paced per host by `RATE_LIMIT`, 429/5xx responses and connection errors are retried
+        up to `MAX_RETRIES` times with backoff. No request or retry outlasts `fetch_deadline` when it is set.
+        GET responses are served from the on-disk cache while fresh and revalidated with ETag/Last-Modified
+        once stale, pass `cache=False` to bypass the cache.
+        With `REPLAY_MODE` set, responses are recorded to or replayed from `FIXTURE_DIR`.
+        """
+        if not REPLAY_MODE:
+            return self._fetch(method, url, *args, cache=cache, **kwargs)
+
+        body = json.dumps(kwargs["json"], sort_keys=True) if "json" in kwargs else str(kwargs.get("data") or "")
+        key = cache_key(method, url, kwargs.get("headers"), body)
+        if REPLAY_MODE == "replay":
+            fixture = fixture_store().load(url, key)
+            if fixture is None:
+                raise FileNotFoundError(f"No recorded response for {url}")
+            return fixture.to_response()
+        resp = self._fetch(method, url, *args, cache=False, **kwargs)
+        fixture_store().save(url, key, resp)
+        return resp
+
+    def _fetch(
+            self,
+            method: Literal["get", "post"],
+            url: str,
+            *args: Any,
+            cache: bool = True,
+            **kwargs: Any
+    ) -> requests.Response:
+        timeout = kwargs.pop("timeout", REQUEST_TIMEOUT)
+        ttl = CACHE_TTL.get(normalize_host(url), CACHE_TTL["default"])
+        use_cache = cache and CACHE_ENABLED and method == "get" and ttl > 0
+
+        cached = None
+        if use_cache:
+            key = cache_key(method, url, kwargs.get("headers"))
+            cached = response_cache().get(key)
+            if cached and cached.is_fresh(ttl):
+                return cached.to_response()
+            if cached and (cached.etag or cached.last_modified):
+                headers = dict(kwargs.get("headers") or {})
+                if cached.etag:
+                    headers["If-None-Match"] = cached.etag
+                if cached.last_modified:
+                    headers["If-Modified-Since"] = cached.last_modified
+                kwargs["headers"] = headers
+
+        clearance = self.clearance.clearance(self.client) if self.clearance else None
+        resp, attempt = send_with_retries(
+            url,
+            lambda attempt_timeout: self.client.request(
+                method=method, url=url, proxies=proxy_router().for_url(url), timeout=attempt_timeout, *args, **kwargs
+            ),
+            rate_limiter().for_url(url),
+            host_semaphore(url),
+            MAX_RETRIES,
+            RETRY_BACKOFF,
+            RETRY_MAX_DELAY,
+            log.warning,
+            timeout=timeout,
+            deadline=fetch_deadline.get()
         )
+        if self.clearance:
+            self.clearance.record(self.client, clearance)
+        if use_cache and cached and resp.status_code == 304:
+            response_cache().refresh(key)
+            return cached.to_response()
         if resp.status_code != 200:
-            log.error(f"Failed to retrieve URL {url}")
-            sys.exit(-1)
+            raise FetchError(url, resp.status_code, attempt, response=resp)
+        if use_cache:
+            response_cache().put(key, resp)
         return resp
 
+    async def search_performers(
+            self,
+            info: dict[Literal["name"], str],
+            timeout: float
+    ) -> list[PerformerSearchResult]:
+        """
+        Run `parse_performer_by_name` in the shared thread pool and give up after `timeout` seconds.
+        A slow or failing site yields an empty list, so the results of the other sites are still returned.
+        The requests of the search share the same deadline, so the thread is done soon after giving up instead of
+        keeping the process alive until the site answers.
+        :param info:
+        :param timeout:
+        :return:
+        """
+        loop = asyncio.get_running_loop()
+        deadline = time.monotonic() + timeout
+        try:
+            return await asyncio.wait_for(
+                loop.run_in_executor(executor, self._parse_performer_by_name_or_empty, info, deadline),
+                timeout=timeout
+            )
+        except asyncio.TimeoutError:
+            log.warning(f"{self.name} performer search timed out after {timeout}s")
+            return []
+
+    def _parse_performer_by_name_or_empty(
+            self,
+            info: dict[Literal["name"], str],
+            deadline: float
+    ) -> list[PerformerSearchResult]:
+        token = fetch_deadline.set(deadline)
+        try:
+            return self.parse_performer_by_name(info)
+        except Exception as e:
+            log.warning(f"{self.name} performer search failed: {e!r}")
+            return []
+        finally:
+            fetch_deadline.reset(token)
+
+    def performer(self, url: str) -> ScrapedPerformer:
+        """
+        `parse_performer_by_url` through the performer store shared by all scrapers,
+        so a performer appearing in many galleries is only fetched once per `PERFORMER_TTL`.
+        """
+        if not CACHE_ENABLED or REPLAY_MODE:
+            return self.parse_performer_by_url({"url": url})
+        return performer_store().get_or_fetch(url, lambda u: self.parse_performer_by_url({"url": u}))
+
+    def performers(
+            self,
+            urls: list[str],
+            fetch_many: Callable[[list[str]], dict[str, ScrapedPerformer]]
+    ) -> dict[str, ScrapedPerformer]:
+        """
+        Like `performer` for sites that can fetch many performers in one request. `fetch_many` is called once
+        with the URLs not in the store and returns their performers by URL. Performers not found are left out.
+        """
+        if not CACHE_ENABLED or REPLAY_MODE:
+            return fetch_many(urls) if urls else {}
+        performers = performer_store().get_or_fetch_many(urls, fetch_many)
+        return {url: performer for url, performer in zip(urls, performers) if performer is not None}
+
+    def parse_galleries_by_url(self, infos: list[dict[Literal["url"], str]]) -> list[ScrapedGallery | None]:
+        """
+        Scrape many galleries of this site, None for the ones that failed.
+        Sites with a bulk API override this to save requests.
+        """
+        def scrape(info: dict[Literal["url"], str]) -> ScrapedGallery | None:
+            try:
+                return self.parse_gallery_by_url(info)
+            except (Exception, SystemExit) as e:  # one bad URL must not abort the batch
+                log.error(f"Failed to scrape {info.get('url')}: {e!r}")
+                return None
+
+        # not `parallel_map`, the galleries fetch their performers through it
+        return list(executor.map(scrape, infos))
+
     @abstractmethod
     def parse_performer_by_url(self, info: dict[Literal["url"], str]) -> ScrapedPerformer:
         pass
@@ -1 +1,4 @@
-from .string import jaccard_similarity
+from .concurrency import parallel_map, host_semaphore, normalize_host
+from .html import make_soup, parse_only
+from .ranking import rank_names, normalize_name
+from .transport import HTTP2Adapter, configure_session
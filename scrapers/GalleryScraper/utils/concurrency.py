@@ -0,0 +1,36 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, TypeVar
+from urllib.parse import urlsplit
+
+from config import MAX_WORKERS, HOST_CONCURRENCY
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="detail-fetch")
+_host_semaphores: dict[str, threading.BoundedSemaphore] = {}
+_host_semaphores_lock = threading.Lock()
+
+
+def normalize_host(url: str) -> str:
+    host = urlsplit(url).netloc.lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def host_semaphore(url: str) -> threading.BoundedSemaphore:
+    """Get the semaphore limiting the number of in-flight requests to the host of `url`."""
+    host = normalize_host(url)
+    with _host_semaphores_lock:
+        if host not in _host_semaphores:
+            limit = HOST_CONCURRENCY.get(host, HOST_CONCURRENCY["default"])
+            _host_semaphores[host] = threading.BoundedSemaphore(limit)
+        return _host_semaphores[host]
+
+
+def parallel_map(fn: Callable[[T], R], items: Iterable[T]) -> list[R]:
+    """Call `fn` on every item in the shared thread pool, keeping the input order in the result."""
+    items = list(items)
+    if len(items) <= 1:
+        return [fn(item) for item in items]
+    return list(_executor.map(fn, items))
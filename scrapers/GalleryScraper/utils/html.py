@@ -0,0 +1,5 @@
+from config import HTML_PARSER
+from scraper_common.html import SoupMaker, parse_only
+
+# builds the tree of every page, with lxml unless HTML_PARSER says otherwise
+make_soup = SoupMaker(HTML_PARSER)
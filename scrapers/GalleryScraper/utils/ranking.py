@@ -0,0 +1,77 @@
+import heapq
+import re
+import unicodedata
+from functools import cache, lru_cache
+from importlib.util import find_spec
+from typing import Callable, Iterable, Optional, TypeVar
+
+T = TypeVar("T")
+
+# separators between the aliases of a name, e.g. `Name (Alias)`, `Name / Alias`
+ALIAS_SEPARATORS = re.compile(r"[/,;|、，；()\[\]（）【】]")
+# everything but letters and digits, so that spacing and punctuation do not matter
+NON_WORD = re.compile(r"[\W_]+")
+KATAKANA = {code: code - 0x60 for code in range(0x30A1, 0x30F7)}
+
+
+@cache
+def _to_simplified() -> Optional[Callable[[str], str]]:
+    """Traditional to simplified Chinese conversion, if opencc is installed."""
+    if not find_spec("opencc"):
+        return None
+    import opencc
+    return opencc.OpenCC("t2s").convert
+
+
+@lru_cache(maxsize=4096)
+def normalize_name(name: str) -> str:
+    """
+    Fold the variations of a name that should compare equal: full and half width forms, case, katakana and hiragana,
+    traditional and simplified Chinese (with opencc), spacing and punctuation.
+    """
+    name = unicodedata.normalize("NFKC", name).casefold().translate(KATAKANA)
+    if to_simplified := _to_simplified():
+        name = to_simplified(name)
+    return NON_WORD.sub("", name)
+
+
+@lru_cache(maxsize=4096)
+def name_grams(name: str) -> tuple[frozenset[str], ...]:
+    """
+    The character bigrams of every alias in `name`, padded at both ends so that one character aliases have bigrams
+    too, and a name matching the start or end of another scores higher than one matching in the middle.
+    """
+    aliases = {normalize_name(alias) for alias in ALIAS_SEPARATORS.split(name)} - {""}
+    return tuple(
+        frozenset(padded[i:i + 2] for i in range(len(padded) - 1))
+        for padded in (f"\0{alias}\0" for alias in aliases)
+    )
+
+
+class NameQuery:
+    """A searched name, normalized once and compared against any number of candidate names."""
+
+    def __init__(self, name: str):
+        self.grams = name_grams(name)
+
+    def score(self, candidate: str) -> float:
+        """Dice coefficient of the character bigrams of the best matching pair of aliases, 1.0 for equal names."""
+        best = 0.0
+        for candidate_grams in name_grams(candidate):
+            for grams in self.grams:
+                overlap = len(grams & candidate_grams)
+                if overlap:
+                    best = max(best, 2 * overlap / (len(grams) + len(candidate_grams)))
+        return best
+
+
+def rank_names(name: str, items: Iterable[T], key: Callable[[T], str], limit: Optional[int] = None) -> list[T]:
+    """
+    Order `items` by how well `key(item)` matches `name`, best first and stable for equal scores.
+    With `limit`, only the best `limit` items are selected instead of sorting all of them.
+    """
+    query = NameQuery(name)
+    scored = [(query.score(key(item)), item) for item in items]
+    if limit is not None:
+        return [item for _, item in heapq.nlargest(limit, scored, key=lambda pair: pair[0])]
+    return [item for _, item in sorted(scored, key=lambda pair: pair[0], reverse=True)]
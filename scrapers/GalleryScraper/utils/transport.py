@@ -0,0 +1,139 @@
+import os
+import ssl
+import threading
+from http.client import HTTPMessage
+from importlib.util import find_spec
+from typing import Iterable, Optional, Union
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.cookies import extract_cookies_to_jar
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers, select_proxy
+
+from config import HOST_CONCURRENCY, HTTP2, HTTP2_HOSTS, KEEPALIVE_EXPIRY
+from py_common import log
+
+# connection-specific headers, not allowed in HTTP/2 requests
+HOP_BY_HOP_HEADERS = ("connection", "keep-alive", "proxy-connection", "transfer-encoding", "upgrade")
+# brotli responses are only decoded by urllib3 when one of the brotli packages is installed
+ACCEPT_ENCODING = "gzip, deflate, br" if find_spec("brotli") or find_spec("brotlicffi") else "gzip, deflate"
+
+
+class _RawResponse:
+    """Just enough of an urllib3 response for requests to pick up the cookies set by the server."""
+
+    def __init__(self, headers: Iterable[tuple[str, str]]):
+        self._original_response = self
+        self.msg = HTTPMessage()
+        for name, value in headers:
+            self.msg[name] = value
+
+    def close(self):
+        pass
+
+
+def ssl_context(verify: Union[bool, str], cert: Union[None, str, tuple[str, str]]) -> Union[bool, ssl.SSLContext]:
+    """
+    The httpx `verify` for the `verify` (a bool, or a CA bundle file or directory) and client `cert` of requests.
+    httpx deprecated taking paths for either, so they are loaded into a context here.
+    """
+    if isinstance(verify, bool) and cert is None:
+        return verify
+    if isinstance(verify, str):
+        context = ssl.create_default_context(**{"capath" if os.path.isdir(verify) else "cafile": verify})
+    elif verify:
+        import certifi  # the bundle requests and httpx verify against by default
+        context = ssl.create_default_context(cafile=certifi.where())
+    else:
+        context = ssl.create_default_context()
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    if isinstance(cert, tuple):
+        context.load_cert_chain(*cert)
+    elif cert:
+        context.load_cert_chain(cert)
+    return context
+
+
+class HTTP2Adapter(BaseAdapter):
+    """
+    Transport adapter sending requests through httpx over HTTP/2, with one client per proxy and TLS settings.
+    Bodies are read before returning, so `stream=True` is not streamed.
+    """
+
+    def __init__(self, max_connections: int):
+        super().__init__()
+        import httpx
+        self._httpx = httpx
+        self._limits = httpx.Limits(
+            max_connections=max_connections, max_keepalive_connections=max_connections,
+            keepalive_expiry=KEEPALIVE_EXPIRY
+        )
+        self._clients: dict[tuple, "httpx.Client"] = {}
+        self._lock = threading.Lock()
+
+    def _client(self, proxy: Optional[str], verify: Union[bool, str], cert: Union[None, str, tuple[str, str]]):
+        """
+        The client for a proxy, `verify` (a bool or a CA bundle path) and client certificate, as passed by requests.
+        The environment was already applied by requests, so httpx must not read it again.
+        """
+        key = (proxy, verify, cert)
+        with self._lock:
+            if key not in self._clients:
+                self._clients[key] = self._httpx.Client(
+                    http2=True, limits=self._limits, proxy=proxy, verify=ssl_context(verify, cert), trust_env=False,
+                    follow_redirects=False
+                )
+            return self._clients[key]
+
+    def send(self, request: requests.PreparedRequest, stream=False, timeout=None, verify=True, cert=None,
+             proxies=None) -> requests.Response:
+        if isinstance(timeout, tuple):
+            timeout = self._httpx.Timeout(timeout[1], connect=timeout[0])
+        client = self._client(select_proxy(request.url, proxies or {}), verify, cert)
+        headers = {k: v for k, v in request.headers.items() if k.lower() not in HOP_BY_HOP_HEADERS}
+        try:
+            resp = client.request(request.method, request.url, headers=headers, content=request.body, timeout=timeout)
+        except self._httpx.TimeoutException as e:
+            raise requests.Timeout(e, request=request)
+        except self._httpx.TransportError as e:
+            raise requests.ConnectionError(e, request=request)
+
+        response = requests.Response()
+        response.status_code = resp.status_code
+        response.reason = resp.reason_phrase
+        response.headers = CaseInsensitiveDict(resp.headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response.raw = _RawResponse(resp.headers.multi_items())
+        response._content = resp.content
+        extract_cookies_to_jar(response.cookies, request, response.raw)
+        return response
+
+    def close(self):
+        with self._lock:
+            for client in self._clients.values():
+                client.close()
+            self._clients.clear()
+
+
+def configure_session(session: requests.Session, hosts: Iterable[str]):
+    """
+    Prefer compressed responses and give each host a connection pool as large as its `HOST_CONCURRENCY`.
+    Hosts in `HTTP2_HOSTS` use HTTP/2 when `HTTP2` is enabled and httpx is installed.
+    """
+    session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+    http2 = HTTP2 and find_spec("httpx") is not None and find_spec("h2") is not None
+    if HTTP2 and not http2:
+        log.warning("HTTP2 is enabled but httpx[http2] is not installed, using HTTP/1.1")
+    for host in hosts:
+        limit = HOST_CONCURRENCY.get(host, HOST_CONCURRENCY["default"])
+        if http2 and host in HTTP2_HOSTS:
+            adapter = HTTP2Adapter(max_connections=limit)
+        else:
+            adapter = HTTPAdapter(pool_maxsize=limit)
+        for prefix in (f"https://{host}/", f"https://www.{host}/"):
+            session.mount(prefix, adapter)
@@ -0,0 +1,116 @@
+import argparse
+import copy
+import json
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import IO, Iterator, Optional
+
+from config import BATCH_WORKERS, BATCH_REPORT_INTERVAL, CACHE_ENABLED, REPLAY_MODE
+from py_common import log
+from py_common.types import ScrapedPerformer, ScrapedScene
+from scraper import JavDB, performer_store
+
+
+class BatchJavDB(JavDB):
+    """A scraper shared by all scenes of a batch, fetching every actress page once for the whole batch."""
+
+    def __init__(self):
+        super().__init__()
+        self._performers: dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def parse_performer(self, url: str) -> ScrapedPerformer:
+        with self._lock:
+            future = self._performers.get(url)
+            owner = future is None
+            if owner:
+                future = self._performers[url] = Future()
+        if owner:
+            try:
+                future.set_result(super().parse_performer(url))
+            except Exception as e:
+                future.set_exception(e)
+        # parse_jav fills in missing names, so every scene gets its own copy
+        return copy.deepcopy(future.result())
+
+
+def identify(scraper: JavDB, fragment: dict) -> Optional[ScrapedScene]:
+    keyword = fragment.get("code") or fragment.get("title")
+    if not keyword:
+        raise ValueError("No Title or Code provided")
+    url = scraper.search_scene(keyword)
+    return scraper.parse_jav(url) if url else None
+
+
+def read_fragments(stream: IO[str]) -> Iterator[dict]:
+    for line_no, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            log.error(f"Skipping invalid fragment on line {line_no}: {e}")
+
+
+def identify_all(fragments: Iterator[dict], out: IO[str]):
+    """
+    Identify a stream of scene fragments, `BATCH_WORKERS` at a time through one shared session.
+    Every result is written to `out` as a JSONL line as soon as it completes, so the output is not in input order.
+    """
+    scraper = BatchJavDB()
+    start, done, found = time.monotonic(), 0, 0
+
+    def emit(fragment: dict, future: Future):
+        nonlocal done, found
+        record = {"fragment": fragment}
+        try:
+            record["result"] = future.result()
+            found += record["result"] is not None
+        except Exception as e:
+            log.error(f"Failed to identify {fragment}: {e!r}")
+            record["error"] = repr(e)
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        out.flush()
+        done += 1
+        if done % BATCH_REPORT_INTERVAL == 0:
+            report()
+
+    def report():
+        elapsed = time.monotonic() - start
+        log.info(f"{done} scenes processed, {found} identified, {done / elapsed * 60:.1f} scenes/min")
+        if CACHE_ENABLED and not REPLAY_MODE:
+            log.info(f"Performer store: {performer_store().stats}")
+
+    with ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix="scene") as executor:
+        pending: dict[Future, dict] = {}
+        for fragment in fragments:
+            # keep the input stream lazy, only a bounded number of scenes is queued at a time
+            if len(pending) >= BATCH_WORKERS * 2:
+                completed, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in completed:
+                    emit(pending.pop(future), future)
+            pending[executor.submit(identify, scraper, fragment)] = fragment
+        while pending:
+            completed, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in completed:
+                emit(pending.pop(future), future)
+    if done:
+        report()
+
+
+def main(args: list[str]):
+    parser = argparse.ArgumentParser(
+        prog="main.py batch", description="Identify scenes from a JSONL stream of sceneByFragment inputs."
+    )
+    parser.add_argument("--input", type=argparse.FileType("r", encoding="utf-8"), default=sys.stdin,
+                        help="JSONL file of fragments with a code or title, stdin by default")
+    parser.add_argument("--output", type=argparse.FileType("a", encoding="utf-8"), default=sys.stdout,
+                        help="append the results to this JSONL file, stdout by default")
+    opts = parser.parse_args(args)
+    try:
+        identify_all(read_fragments(opts.input), opts.output)
+    finally:
+        opts.input.close()
+        opts.output.close()
@@ -0,0 +1,54 @@
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+CODE_PATTERN = re.compile(r"[A-Z0-9]+(?:[-_][A-Z0-9]+)*")
+
+
+def normalize_code(text: str) -> Optional[str]:
+    """
+    Normalize a movie code so that case, separators and zero padding do not matter, e.g. `abc-012` and `ABC12`
+    both become `ABC-12`. The groups of letters and digits stay separated, so `T28-123` (`T-28-123`) and `T-28123`
+    (`T-28123`) remain different codes. Returns None if `text` does not look like a code.
+    """
+    text = text.strip().upper()
+    if not CODE_PATTERN.fullmatch(text) or not re.search(r"[A-Z]", text) or not re.search(r"\d", text):
+        return None
+    return "-".join(str(int(part)) if part.isdigit() else part for part in re.findall(r"[A-Z]+|\d+", text))
+
+
+class CodeIndex:
+    """
+    SQLite backed index of normalized movie codes to their page URL, filled from previous searches.
+    Entries older than `ttl` seconds are not used, so a movie whose page moved is searched for again.
+    """
+
+    def __init__(self, path: Path, ttl: float):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS codes (code TEXT PRIMARY KEY, url TEXT, stored_at REAL)")
+
+    def get(self, code: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url FROM codes WHERE code = ? AND stored_at >= ?", (code, time.time() - self.ttl)
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, entries: dict[str, str]):
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO codes VALUES (?, ?, ?)", [(code, url, now) for code, url in entries.items()]
+            )
+
+    def forget(self, url: str):
+        """Drop the codes of a page that no longer exists."""
+        with self._lock:
+            self._conn.execute("DELETE FROM codes WHERE url = ?", (url,))
@@ -0,0 +1,50 @@
+import os
+from pathlib import Path
+
+# actress pages of a movie fetched in parallel
+MAX_WORKERS = 4
+# maximum number of in-flight requests to javdb.com
+CONCURRENCY = 2
+# proxy per host, "default" applies to unlisted hosts: "system" for the proxy of the environment/OS settings,
+# a proxy URL such as "http://127.0.0.1:7890", or None to connect directly
+PROXIES = {
+    "default": "system",
+}
+# (requests per second, burst) per host, "default" applies to unlisted hosts.
+# Shared by all scraper processes through the files in RATE_LIMIT_DIR
+RATE_LIMIT = {
+    "default": (1.0, 4),
+}
+# retries of 429/5xx responses and connection errors, backing off exponentially from RETRY_BACKOFF seconds
+# unless the site sends Retry-After
+MAX_RETRIES = 3
+RETRY_BACKOFF = 1.0
+RETRY_MAX_DELAY = 60
+# BeautifulSoup parser, None to use lxml when installed and html.parser otherwise
+HTML_PARSER = None
+
+# `python main.py batch`: scenes identified at a time and how often the throughput is logged
+BATCH_WORKERS = 4
+BATCH_REPORT_INTERVAL = 50
+
+# on-disk cache of HTTP responses, shared between scraper runs
+CACHE_ENABLED = True
+CACHE_DIR = Path.home() / ".cache" / "stash-scrapers"
+CACHE_MAX_SIZE = 512 * 1024 * 1024  # bytes
+CACHE_TTL = 24 * 60 * 60  # seconds a cached response is used without revalidation
+CODE_INDEX_TTL = 30 * 24 * 60 * 60  # seconds the page found for a movie code is used without searching again
+# parsed performers, shared with GalleryScraper through CACHE_DIR
+PERFORMER_TTL = 7 * 24 * 60 * 60
+PERFORMER_NOT_FOUND_TTL = 24 * 60 * 60  # seconds a performer page that answered 404 is not fetched again
+
+# Cloudflare clearance cookies, reused across runs until they expire
+CLEARANCE_DIR = CACHE_DIR / "clearance"
+RATE_LIMIT_DIR = CACHE_DIR / "ratelimit"
+
+# "record" saves every response to FIXTURE_DIR, "replay" answers requests from it instead of the live site
+REPLAY_MODE = os.environ.get("SCRAPER_REPLAY_MODE", "")
+FIXTURE_DIR = Path(os.environ.get("SCRAPER_FIXTURE_DIR", CACHE_DIR / "fixtures"))
+
+# unix socket of the resident scraper process started with `python main.py serve`
+DAEMON_SOCKET = CACHE_DIR / "javdb-scraper.sock"
+DAEMON_TIMEOUT = 300  # seconds to wait for the resident process to answer
@@ -0,0 +1,65 @@
+import sys
+from functools import cache
+from typing import Any, Callable, Literal, Optional
+
+from py_common import log
+from py_common.deps import ensure_requirements
+from py_common.types import ScrapedScene, SceneSearchResult, PerformerSearchResult, ScrapedPerformer
+from scraper import JavDB
+
+ensure_requirements("bs4:beautifulsoup4", "requests", "cloudscraper")
+
+
+@cache
+def get_scraper() -> JavDB:
+    """The scraper instance is reused, so a resident daemon keeps its warmed session alive."""
+    return JavDB()
+
+
+def scene_by_url(url_info: dict[Literal["url"], str]) -> ScrapedScene:
+    if not url_info.get("url"):
+        log.error("No URL provided")
+        sys.exit(-1)
+    return get_scraper().parse_jav(url_info.get("url"))
+
+
+def scene_by_name(title_info: dict[Literal["title"], str]) -> list[SceneSearchResult]:
+    if not title_info.get("title"):
+        log.error("No Title provided")
+        sys.exit(-1)
+    return get_scraper().search_scenes(title_info.get("title"))
+
+
+def scene_by_fragment(fragment_info: dict) -> Optional[ScrapedScene]:
+    if not fragment_info.get("title") and not fragment_info.get("code"):
+        log.error("No Title or Code provided")
+        sys.exit(-1)
+    scraper = get_scraper()
+    target_url = scraper.search_scene(fragment_info.get("code") or fragment_info.get("title"))
+    if not target_url:
+        return None
+    else:
+        return scraper.parse_jav(target_url)
+
+
+def performer_by_name(name_info: dict[Literal["name"], str]) -> list[PerformerSearchResult]:
+    if not name_info.get("name"):
+        log.error("No Title provided")
+        sys.exit(-1)
+    return get_scraper().search_performers(name_info.get("name"))
+
+
+def performer_by_url(url_info: dict[Literal["url"], str]) -> ScrapedPerformer:
+    if not url_info.get("url"):
+        log.error("No URL provided")
+        sys.exit(-1)
+    return get_scraper().parse_performer(url_info.get("url"))
+
+
+MODES: dict[str, Callable[[dict], Any]] = {
+    "sceneByURL": scene_by_url,
+    "sceneByName": scene_by_name,
+    "sceneByFragment": scene_by_fragment,
+    "performerByURL": performer_by_url,
+    "performerByName": performer_by_name,
+}
@@ -0,0 +1,69 @@
+import codecs
+from html.parser import HTMLParser
+from typing import Iterable, Iterator, Optional
+
+from config import HTML_PARSER
+from scraper_common.html import SoupMaker, parse_only
+
+# builds the tree of every page, with lxml unless HTML_PARSER says otherwise
+make_soup = SoupMaker(HTML_PARSER)
+
+
+class SearchResultParser(HTMLParser):
+    """
+    Incremental parser of the items of a search page. Markup is fed chunk by chunk and every item is appended
+    to `results` as `(code, title, href)` once its title is complete, so callers can stop reading early.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.results: list[tuple[str, str, str]] = []
+        self._href: Optional[str] = None
+        self._title_depth = 0
+        self._in_code = False
+        self._title: list[str] = []
+        self._code: list[str] = []
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, Optional[str]]]):
+        attrs = dict(attrs)
+        classes = (attrs.get("class") or "").split()
+        if self._title_depth:
+            if tag == "div":
+                self._title_depth += 1
+            elif tag == "strong":
+                self._in_code = True
+        elif tag == "a" and "box" in classes:
+            self._href = attrs.get("href")
+        elif tag == "div" and "video-title" in classes and self._href:
+            self._title_depth = 1
+            self._title, self._code = [], []
+
+    def handle_endtag(self, tag: str):
+        if not self._title_depth:
+            return
+        if tag == "strong":
+            self._in_code = False
+        elif tag == "div":
+            self._title_depth -= 1
+            if not self._title_depth:
+                self.results.append(("".join(self._code).strip(), "".join(self._title).strip(), self._href))
+                self._href = None
+
+    def handle_data(self, data: str):
+        if self._title_depth:
+            self._title.append(data)
+            if self._in_code:
+                self._code.append(data)
+
+
+def iter_search_results(chunks: Iterable[bytes]) -> Iterator[tuple[str, str, str]]:
+    """Yield the `(code, title, href)` of the search result items while the page is still being read."""
+    parser = SearchResultParser()
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    for chunk in chunks:
+        parser.feed(decoder.decode(chunk))
+        yield from parser.results
+        parser.results.clear()
+    parser.feed(decoder.decode(b"", final=True))
+    parser.close()
+    yield from parser.results
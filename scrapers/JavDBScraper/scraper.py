@@ -1,14 +1,63 @@
 import re
-from typing import Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
+from typing import Iterator, Optional
 from urllib.parse import urljoin
-from urllib.request import getproxies
 
 import unicodedata
-from bs4 import BeautifulSoup
+import requests
+from bs4 import BeautifulSoup, SoupStrainer
 from cloudscraper import create_scraper, CloudScraper
 
+from codes import CodeIndex, normalize_code
+from config import MAX_WORKERS, CONCURRENCY, CACHE_ENABLED, CACHE_DIR, CACHE_MAX_SIZE, CACHE_TTL, CLEARANCE_DIR, \
+    REPLAY_MODE, FIXTURE_DIR, PERFORMER_TTL, PERFORMER_NOT_FOUND_TTL, MAX_RETRIES, RETRY_BACKOFF, RETRY_MAX_DELAY, \
+    RATE_LIMIT, RATE_LIMIT_DIR, PROXIES, CODE_INDEX_TTL
+from parsing import iter_search_results, make_soup, parse_only
+from py_common import log
 from py_common.types import ScrapedPerformer, ScrapedScene, ScrapedStudio, ScrapedTag, SceneSearchResult, \
     PerformerSearchResult, ScrapedGroup
+from scraper_common.cache import ResponseCache, cache_key
+from scraper_common.clearance import ClearanceStore
+from scraper_common.fixtures import FixtureStore
+from scraper_common.performers import PerformerStore
+from scraper_common.proxies import ProxyRouter, disable_trust_env
+from scraper_common.ratelimit import RateLimiter
+from scraper_common.retry import FetchError, send_with_retries
+
+executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="javdb")
+request_semaphore = threading.BoundedSemaphore(CONCURRENCY)
+
+
+@cache
+def response_cache() -> ResponseCache:
+    return ResponseCache(CACHE_DIR / "javdb-http.sqlite", max_size=CACHE_MAX_SIZE)
+
+
+@cache
+def code_index() -> CodeIndex:
+    return CodeIndex(CACHE_DIR / "javdb-codes.sqlite", ttl=CODE_INDEX_TTL)
+
+
+@cache
+def fixture_store() -> FixtureStore:
+    return FixtureStore(FIXTURE_DIR)
+
+
+@cache
+def performer_store() -> PerformerStore:
+    return PerformerStore(CACHE_DIR / "performers.sqlite", ttl=PERFORMER_TTL, negative_ttl=PERFORMER_NOT_FOUND_TTL)
+
+
+@cache
+def rate_limiter() -> RateLimiter:
+    return RateLimiter(RATE_LIMIT, RATE_LIMIT_DIR)
+
+
+@cache
+def proxy_router() -> ProxyRouter:
+    return ProxyRouter(PROXIES)
 
 
 class JavDB:
@@ -16,18 +65,86 @@ class JavDB:
 
     def __init__(self):
         self.client: CloudScraper = create_scraper()
+        # proxies come from `proxy_router`, instead of requests reading the environment again on every request
+        disable_trust_env(self.client)
+        self.clearance = ClearanceStore(CLEARANCE_DIR, "javdb.com")
+        self.clearance.load(self.client)
+
+    def fetch_chunks(self, url: str, cache: bool = True) -> Iterator[bytes]:
+        """
+        Fetch a page and yield its body in chunks as it arrives. Responses are served from the on-disk cache while
+        fresh and revalidated with ETag/Last-Modified once stale, pass `cache=False` to bypass the cache.
+        With `REPLAY_MODE` set, responses are recorded to or replayed from `FIXTURE_DIR`.
+        A response is only cached or recorded once it has been read to the end.
+        """
+        headers = {
+            "accept-language": "zh-CN,zh;q=0.9,en;q=0.8,en-GB;q=0.7,en-US;q=0.6",
+        }
+        if REPLAY_MODE == "replay":
+            fixture = fixture_store().load(url, cache_key("get", url, headers))
+            if fixture is None:
+                raise FileNotFoundError(f"No recorded response for {url}")
+            yield fixture.content
+            return
+        use_cache = cache and CACHE_ENABLED and CACHE_TTL > 0 and REPLAY_MODE != "record"
+
+        cached = None
+        if use_cache:
+            key = cache_key("get", url, headers)
+            cached = response_cache().get(key)
+            if cached and cached.is_fresh(CACHE_TTL):
+                yield cached.content
+                return
+            if cached and cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached and cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
 
-    def fetch_soup(self, url: str) -> BeautifulSoup:
-        resp = self.client.get(
-            url=url, proxies=getproxies(), headers={
-                "accept-language": "zh-CN,zh;q=0.9,en;q=0.8,en-GB;q=0.7,en-US;q=0.6",
-            }
+        resp, attempts = self._request(url, headers)
+        with resp:
+            if use_cache and cached and resp.status_code == 304:
+                response_cache().refresh(key)
+                yield cached.content
+                return
+            if resp.status_code != 200:
+                raise FetchError(url, resp.status_code, attempts, response=resp)
+            chunks = []
+            for chunk in resp.iter_content(chunk_size=16 * 1024):
+                chunks.append(chunk)
+                yield chunk
+            resp._content = b"".join(chunks)
+        if use_cache:
+            response_cache().put(key, resp)
+        if REPLAY_MODE == "record":
+            fixture_store().save(url, cache_key("get", url, headers), resp)
+
+    def _request(self, url: str, headers: dict) -> tuple[requests.Response, int]:
+        """
+        Send a streamed GET paced by `RATE_LIMIT`, retrying 429/5xx responses and connection errors
+        up to `MAX_RETRIES` times with backoff. Returns the last response and the number of attempts.
+        """
+        clearance = self.clearance.clearance(self.client)
+        resp, attempt = send_with_retries(
+            url,
+            lambda timeout: self.client.get(
+                url=url, proxies=proxy_router().for_url(url), headers=headers, stream=True, timeout=timeout
+            ),
+            rate_limiter().for_url(url),
+            request_semaphore,
+            MAX_RETRIES,
+            RETRY_BACKOFF,
+            RETRY_MAX_DELAY,
+            log.warning
         )
-        resp.raise_for_status()
-        return BeautifulSoup(resp.content, "html.parser")
+        self.clearance.record(self.client, clearance)
+        return resp, attempt
+
+    def fetch_soup(self, url: str, cache: bool = True, strainer: Optional[SoupStrainer] = None) -> BeautifulSoup:
+        """Fetch and parse a page, see `fetch_chunks`. Only the subtrees matched by `strainer` are parsed when given."""
+        return make_soup(b"".join(self.fetch_chunks(url, cache)), strainer)
 
     def search_scenes(self, keyword: str) -> list[SceneSearchResult]:
-        soup = self.fetch_soup(urljoin(self.base_url, f"/search?q={keyword}&f=all"))
+        soup = self.fetch_soup(urljoin(self.base_url, f"/search?q={keyword}&f=all"), strainer=parse_only(".movie-list"))
         result = []
         for movie_elem in soup.select("div.movie-list div.item"):
             title = movie_elem.select_one("div.video-title").text.strip()
@@ -45,15 +162,40 @@ class JavDB:
         return result
 
     def search_scene(self, keyword: str) -> Optional[str]:
-        soup = self.fetch_soup(urljoin(self.base_url, f"/search?q={keyword}&f=all"))
-        for movie_elem in soup.select("div.movie-list div.item"):
-            title = movie_elem.select_one("div.video-title").text.strip()
-            if keyword.upper() in title.upper():
-                return urljoin(self.base_url, movie_elem.select_one("a.box").attrs.get("href"))
-        return None
+        """
+        Find the page of a movie by its code, or by a part of its title. Codes are compared normalized and looked up
+        in the local index of previous searches first. The search page is parsed while it is being read and
+        reading stops at the first match.
+        """
+        code = normalize_code(keyword)
+        use_index = CACHE_ENABLED and not REPLAY_MODE
+        if code and use_index:
+            url = code_index().get(code)
+            if url:
+                return url
+
+        found, seen = None, {}
+        chunks = self.fetch_chunks(urljoin(self.base_url, f"/search?q={keyword}&f=all"))
+        try:
+            for item_code, title, href in iter_search_results(chunks):
+                url = urljoin(self.base_url, href)
+                item_code = normalize_code(item_code)
+                if item_code:
+                    seen[item_code] = url
+                matched = item_code == code if code and item_code else keyword.upper() in title.upper()
+                if matched:
+                    found = url
+                    break
+        finally:
+            chunks.close()
+        if seen and use_index:
+            code_index().put(seen)
+        return found
 
     def search_performers(self, keyword: str) -> list[PerformerSearchResult]:
-        soup = self.fetch_soup(urljoin(self.base_url, f"/search?q={keyword}&f=actor"))
+        soup = self.fetch_soup(
+            urljoin(self.base_url, f"/search?q={keyword}&f=actor"), strainer=parse_only(".box.actor-box")
+        )
         result = []
         for actor in soup.select("div.box.actor-box"):
             name = actor.select_one("strong").text.strip()
@@ -62,7 +204,16 @@ class JavDB:
         return result
 
     def parse_performer(self, url: str) -> ScrapedPerformer:
-        soup = self.fetch_soup(url)
+        """
+        Parse an actress page through the performer store shared with GalleryScraper,
+        so an actress appearing in many movies is only fetched once per `PERFORMER_TTL`.
+        """
+        if not CACHE_ENABLED or REPLAY_MODE:
+            return self._parse_performer(url)
+        return performer_store().get_or_fetch(url, self._parse_performer)
+
+    def _parse_performer(self, url: str) -> ScrapedPerformer:
+        soup = self.fetch_soup(url, strainer=parse_only(".actor-section-name", ".avatar", ".column.section-addition"))
         name, aliases, image, urls = None, None, None, [url]
 
         name_elem = soup.select_one("span.actor-section-name")
@@ -90,7 +241,12 @@ class JavDB:
         )
 
     def parse_jav(self, url: str) -> ScrapedScene:
-        soup = self.fetch_soup(url)
+        try:
+            soup = self.fetch_soup(url)
+        except FetchError as e:
+            if e.status_code == 404 and CACHE_ENABLED and not REPLAY_MODE:
+                code_index().forget(url)  # the page moved, the next search for its code finds the new one
+            raise
         # Title
         title_elem = soup.select_one("strong.current-title")
         title = title_elem.text.strip() if title_elem else ""
@@ -103,6 +259,7 @@ class JavDB:
 
         # Metadata
         code, date, studio, tags, performers, urls, groups = None, None, None, [], [], [url], []
+        performer_links: list[tuple[str, str]] = []
         metadata_container_elem = soup.select_one("nav.panel.movie-panel-info")
         if metadata_container_elem:
             metadata_elems = metadata_container_elem.select("div.panel-block")
@@ -129,12 +286,7 @@ class JavDB:
                     for actor, gender in zip(actor_elems[::2], actor_elems[1::2]):
                         if gender.text.strip() != "♀":
                             continue
-                        performer_name = actor.text.strip()
-                        performer_url = urljoin(self.base_url, actor["href"])
-                        performer = self.parse_performer(performer_url)
-                        if not performer.get("name"):
-                            performer.name = performer_name
-                        performers.append(performer)
+                        performer_links.append((urljoin(self.base_url, actor["href"]), actor.text.strip()))
                 elif info.select_one("div.control.ranking-tags"):
                     for tag in info.select("a.tags"):
                         if "JavDB 影片TOP250" in tag.text:
@@ -146,6 +298,12 @@ class JavDB:
                         elif "年度TOP250" in tag.text:
                             tags.append(ScrapedTag(name="JavDB 年度TOP250"))
 
+        # Performers, fetched in parallel while keeping the order on the page
+        performers = list(executor.map(self.parse_performer, [link for link, _ in performer_links]))
+        for performer, (_, performer_name) in zip(performers, performer_links):
+            if not performer.get("name"):
+                performer["name"] = performer_name
+
         # URLs
         url_container = soup.select_one("div#magnets-content")
         if url_container:
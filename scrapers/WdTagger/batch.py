@@ -0,0 +1,164 @@
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+from config import BATCH_PAGE_SIZE, BATCH_WORKERS, BATCH_CHECKPOINT
+from py_common import log
+from py_common.graphql import callGraphQL
+from tagger import Batcher, tag_gallery
+
+GALLERIES_QUERY = """
+query FindGalleries($after: Int!, $per_page: Int!) {
+  findGalleries(
+    gallery_filter: {id: {value: $after, modifier: GREATER_THAN}}
+    filter: {per_page: $per_page, sort: "id", direction: ASC}
+  ) {
+    count
+    galleries { id image_count tags { id } }
+  }
+}
+"""
+
+GALLERY_QUERY = """
+query FindGallery($id: ID!) {
+  findGallery(id: $id) { id image_count tags { id } }
+}
+"""
+
+
+class TagWriter:
+    """Adds tags to galleries in stash, creating tags that do not exist yet."""
+
+    def __init__(self):
+        self._ids: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def tag_id(self, name: str) -> str:
+        with self._lock:
+            if name not in self._ids:
+                found = callGraphQL(
+                    "query FindTag($name: String!) {"
+                    " findTags(tag_filter: {name: {value: $name, modifier: EQUALS}}) { tags { id } } }",
+                    {"name": name}
+                )["findTags"]["tags"]
+                if found:
+                    self._ids[name] = found[0]["id"]
+                else:
+                    self._ids[name] = callGraphQL(
+                        "mutation CreateTag($name: String!) { tagCreate(input: {name: $name}) { id } }",
+                        {"name": name}
+                    )["tagCreate"]["id"]
+            return self._ids[name]
+
+    def write(self, gallery: dict, names: list[str]):
+        tag_ids = [t["id"] for t in gallery.get("tags", [])]
+        tag_ids += [tag_id for tag_id in map(self.tag_id, names) if tag_id not in tag_ids]
+        callGraphQL(
+            "mutation UpdateGallery($id: ID!, $tag_ids: [ID!]) { galleryUpdate(input: {id: $id, tag_ids: $tag_ids}) { id } }",
+            {"id": gallery["id"], "tag_ids": tag_ids}
+        )
+
+
+def load_checkpoint(path: Path) -> dict:
+    try:
+        state = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        state = {"last_id": 0, "galleries": 0}
+    state.setdefault("failed", [])
+    return state
+
+
+def save_checkpoint(path: Path, state: dict):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(state), encoding="utf-8")
+
+
+def tag_library(output: Optional[Path], write_back: bool, checkpoint: Path, restart: bool):
+    """
+    Tag every gallery of the library. Galleries are paged through in ID order and tagged `BATCH_WORKERS` at a time,
+    their previews are merged into shared model runs. The last completed page and the galleries that failed are
+    saved to `checkpoint`, so an interrupted run resumes there and the failed galleries are retried first.
+    """
+    state = {"last_id": 0, "galleries": 0, "failed": []} if restart else load_checkpoint(checkpoint)
+    batcher = Batcher()
+    writer = TagWriter() if write_back else None
+    out = output.open("a", encoding="utf-8") if output else None
+    out_lock = threading.Lock()
+
+    def process(gallery: dict) -> Optional[int]:
+        """Tag a gallery, returning the number of previews tagged, None if it failed."""
+        try:
+            res, image_count = tag_gallery(
+                gallery["id"], batcher.tags, batcher.infer, image_count=gallery["image_count"]
+            )
+            names = [name for name, _ in res]
+            if writer:
+                writer.write(gallery, names)
+        except Exception as e:
+            log.error(f"Failed to tag gallery {gallery['id']}: {e!r}")
+            return None
+        if out:
+            with out_lock:
+                out.write(json.dumps({"id": gallery["id"], "tags": names}, ensure_ascii=False) + "\n")
+                out.flush()
+        return image_count
+
+    start, galleries, images = time.monotonic(), 0, 0
+
+    def tag_all(executor: ThreadPoolExecutor, page: list[dict]) -> list[str]:
+        """Tag the galleries of `page`, returning the IDs of the ones that failed."""
+        nonlocal galleries, images
+        counts = list(executor.map(process, page))
+        tagged = [count for count in counts if count is not None]
+        galleries += len(tagged)
+        images += sum(tagged)
+        state["galleries"] += len(tagged)
+        return [gallery["id"] for gallery, count in zip(page, counts) if count is None]
+
+    try:
+        with ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix="gallery") as executor:
+            if state["failed"]:
+                log.info(f"retrying {len(state['failed'])} galleries that failed before")
+                # galleries deleted since are dropped
+                retry = [
+                    gallery for gallery_id in state["failed"]
+                    if (gallery := callGraphQL(GALLERY_QUERY, {"id": gallery_id})["findGallery"])
+                ]
+                state["failed"] = tag_all(executor, retry)
+                save_checkpoint(checkpoint, state)
+
+            while True:
+                page = callGraphQL(
+                    GALLERIES_QUERY, {"after": state["last_id"], "per_page": BATCH_PAGE_SIZE}
+                )["findGalleries"]
+                if not page["galleries"]:
+                    break
+                state["failed"] += tag_all(executor, page["galleries"])
+                state["last_id"] = int(page["galleries"][-1]["id"])
+                save_checkpoint(checkpoint, state)
+
+                elapsed = time.monotonic() - start
+                log.info(
+                    f"{state['galleries']} galleries tagged, {len(state['failed'])} failed, "
+                    f"{page['count'] - len(page['galleries'])} remaining, "
+                    f"{galleries / elapsed * 60:.1f} galleries/min, {images / elapsed:.1f} images/s"
+                )
+    finally:
+        if out:
+            out.close()
+
+
+def main(args: list[str]):
+    parser = argparse.ArgumentParser(prog="main.py batch", description="Tag every gallery of the stash library.")
+    parser.add_argument("--output", type=Path, help="append the tags of every gallery to this JSONL file")
+    parser.add_argument("--write", action="store_true", help="add the tags to the galleries in stash")
+    parser.add_argument("--checkpoint", type=Path, default=BATCH_CHECKPOINT, help="progress file to resume from")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and start from the beginning")
+    opts = parser.parse_args(args)
+    if not opts.output and not opts.write:
+        parser.error("at least one of --output and --write is required")
+    tag_library(opts.output, opts.write, opts.checkpoint, opts.restart)
@@ -0,0 +1,38 @@
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+
+class PredictionCache:
+    """
+    Raw model outputs per image, keyed by the SHA-256 of the image content and the model that produced them.
+    Stored as float16, so a changed threshold or tag selection needs no inference at all.
+    """
+
+    def __init__(self, path: Path, model: str):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.model = model
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS predictions ("
+            "digest TEXT, model TEXT, probs BLOB, PRIMARY KEY (digest, model))"
+        )
+
+    def get(self, digest: str) -> Optional[np.ndarray]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT probs FROM predictions WHERE digest = ? AND model = ?", (digest, self.model)
+            ).fetchone()
+        return np.frombuffer(row[0], dtype=np.float16).astype(np.float32) if row else None
+
+    def put_many(self, items: list[tuple[str, np.ndarray]]):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO predictions VALUES (?, ?, ?)",
+                [(digest, self.model, probs.astype(np.float16).tobytes()) for digest, probs in items]
+            )
@@ -1,5 +1,38 @@
+from pathlib import Path
+
 BASE_URL = "http://127.0.0.1:9999"
 MODEL = "SmilingWolf/wd-vit-large-tagger-v3"
 TAG = "SmilingWolf/wd-vit-large-tagger-v3"
 
 PREDICT_THRESHOLD = 0.5
+# CPU fast path: run an INT8 quantized copy of the model, created next to the original on first use
+QUANTIZE = False
+# onnxruntime threads, 0 to let onnxruntime decide
+INTRA_OP_THREADS = 0
+INTER_OP_THREADS = 0
+# model outputs cached per image content, None to disable
+PREDICTION_CACHE = Path.home() / ".cache" / "stash-scrapers" / "wdtagger-predictions.sqlite"
+
+# number of previews tagged per gallery, spread evenly over the gallery
+SAMPLE_COUNT = 10
+# tag previews that many at a time and stop once the tags no longer change, 0 to always tag all samples
+EARLY_STOP_STEP = 0
+
+# previews are downloaded concurrently from stash
+DOWNLOAD_WORKERS = 4
+DOWNLOAD_TIMEOUT = 30
+# decode and resize images in that many processes, 0 to do it in the calling process
+PREPROCESS_WORKERS = 0
+
+# resident tagging server started with `python main.py serve`
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 9997
+SERVER_TIMEOUT = 600
+# images of concurrent requests are collected for up to BATCH_WAIT seconds into a single model run
+MAX_BATCH_SIZE = 32
+BATCH_WAIT = 0.05
+
+# library tagging with `python main.py batch`
+BATCH_PAGE_SIZE = 100
+BATCH_WORKERS = 8  # galleries downloaded and tagged at the same time
+BATCH_CHECKPOINT = Path.home() / ".cache" / "stash-scrapers" / "wdtagger-batch.json"
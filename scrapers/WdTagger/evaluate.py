@@ -0,0 +1,56 @@
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+
+from config import PREDICT_THRESHOLD
+from model import load_session, load_tags, preprocess, infer
+
+IMAGE_SUFFIXES = (".jpg", ".jpeg", ".png", ".webp", ".bmp")
+
+
+def run_model(quantize: bool, files: list[Path], batch_size: int) -> tuple[np.ndarray, float]:
+    # both models on the CPU, so that the speedup compares quantization and not a GPU with a CPU
+    session = load_session(quantize, cpu_only=True)
+    preds, elapsed = [], 0.0
+    for i in range(0, len(files), batch_size):
+        imgs = preprocess(files[i:i + batch_size])
+        start = time.perf_counter()
+        preds.append(infer(session, imgs))
+        elapsed += time.perf_counter() - start
+    return np.concatenate(preds), elapsed
+
+
+def compare(image_dir: Path, batch_size: int):
+    """
+    Report how much the tags of the INT8 quantized model agree with the fp32 model, and how much faster it is.
+    Both run on the CPU.
+    """
+    files = sorted(p for p in image_dir.rglob("*") if p.suffix.lower() in IMAGE_SUFFIXES)
+    if not files:
+        raise FileNotFoundError(f"No images found in {image_dir}")
+    general = load_tags().general
+    fp32_preds, fp32_time = run_model(False, files, batch_size)
+    int8_preds, int8_time = run_model(True, files, batch_size)
+
+    fp32_tags = (fp32_preds > PREDICT_THRESHOLD) & general
+    int8_tags = (int8_preds > PREDICT_THRESHOLD) & general
+    union = (fp32_tags | int8_tags).sum(axis=1)
+    agreement = np.where(union > 0, (fp32_tags & int8_tags).sum(axis=1) / np.maximum(union, 1), 1.0)
+
+    print(f"images:                 {len(files)}")
+    print(f"fp32 inference:         {fp32_time / len(files) * 1000:.1f} ms/image")
+    print(f"int8 inference:         {int8_time / len(files) * 1000:.1f} ms/image ({fp32_time / int8_time:.2f}x)")
+    print(f"tag agreement (Jaccard): mean {agreement.mean():.3f}, min {agreement.min():.3f}")
+    print(f"max probability change: {np.abs(fp32_preds - int8_preds).max():.3f}")
+
+
+def main(args: list[str]):
+    parser = argparse.ArgumentParser(
+        prog="main.py compare", description="Compare the INT8 quantized model with the fp32 model on local images."
+    )
+    parser.add_argument("image_dir", type=Path)
+    parser.add_argument("--batch-size", type=int, default=8)
+    opts = parser.parse_args(args)
+    compare(opts.image_dir, opts.batch_size)
@@ -0,0 +1,68 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
+from typing import Iterator, Optional
+from urllib.parse import urljoin
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import BASE_URL, DOWNLOAD_WORKERS, DOWNLOAD_TIMEOUT, SAMPLE_COUNT
+from py_common.graphql import configuration, callGraphQL
+
+# pooled, so that previews reuse the connections to stash
+session = requests.Session()
+session.mount("http://", HTTPAdapter(pool_maxsize=DOWNLOAD_WORKERS))
+session.mount("https://", HTTPAdapter(pool_maxsize=DOWNLOAD_WORKERS))
+executor = ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS, thread_name_prefix="preview-download")
+
+
+@cache
+def api_key() -> Optional[str]:
+    return configuration().get("general", {}).get("apiKey")
+
+
+def sample_indices(image_count: int, count: int) -> list[int]:
+    """
+    Pick `count` distinct images spread evenly over the gallery, the middle image of each of `count` equal strata.
+    The strata are ordered coarse to fine (bit-reversed), so every prefix of the result also covers the gallery.
+    """
+    count = min(count, image_count)
+    if count <= 0:
+        return []
+    bits = max((count - 1).bit_length(), 1)
+    order = [
+        int(format(i, f"0{bits}b")[::-1], 2)
+        for i in range(1 << bits)
+    ]
+    return [int((stratum + 0.5) * image_count / count) for stratum in order if stratum < count]
+
+
+def preview_urls(gallery_id: str, image_count: Optional[int] = None) -> list[str]:
+    if image_count is None:
+        image_count = callGraphQL(
+            'query { findGallery(id: "' + gallery_id + '") { image_count } }'
+        ).get("findGallery", {}).get("image_count")
+    return [
+        urljoin(BASE_URL, f"/gallery/{gallery_id}/preview/{image_id}")
+        for image_id in sample_indices(image_count, SAMPLE_COUNT)
+    ]
+
+
+def download(url: str) -> Optional[bytes]:
+    try:
+        resp = session.get(url=url, headers={"ApiKey": api_key()}, timeout=DOWNLOAD_TIMEOUT)
+    except requests.RequestException:
+        return None
+    if resp.status_code != 200:
+        return None
+    return resp.content
+
+
+def iter_previews(urls: list[str]) -> Iterator[bytes]:
+    """
+    Download preview images concurrently, yielding them in the order of `urls` so that the sampled order, and with it
+    the early stop of `tag_gallery`, does not depend on which download finished first.
+    """
+    for content in executor.map(download, urls):
+        if content is not None:
+            yield content
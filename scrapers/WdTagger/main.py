@@ -1,37 +1,48 @@
 import json
-import random
 import sys
-from urllib.parse import urljoin
 
 import requests
 
-from config import BASE_URL
-from model import load, predict
-from py_common.graphql import configuration, callGraphQL
+from config import SERVER_HOST, SERVER_PORT, SERVER_TIMEOUT
 from py_common.types import ScrapedGallery, ScrapedTag
 
+
+def tag_remote(gallery_id: str) -> list[tuple[str, float]]:
+    """Tag the gallery with the resident server, raises `requests.ConnectionError` if it is not running."""
+    resp = requests.post(
+        url=f"http://{SERVER_HOST}:{SERVER_PORT}/tag",
+        json={"gallery_id": gallery_id},
+        timeout=SERVER_TIMEOUT
+    )
+    resp.raise_for_status()
+    return [tuple(t) for t in resp.json()["tags"]]
+
+
 if __name__ == "__main__":
-    info = json.loads(sys.stdin.read())
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        from server import serve
+        serve()
+        sys.exit(0)
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        from batch import main
+        main(sys.argv[2:])
+        sys.exit(0)
+    if len(sys.argv) > 1 and sys.argv[1] == "compare":
+        from evaluate import main
+        main(sys.argv[2:])
+        sys.exit(0)
 
-    config = configuration()
+    info = json.loads(sys.stdin.read())
     gallery_id = info.get("id")
-    image_count: int = callGraphQL(
-        'query { findGallery(id: "' + gallery_id + '") { image_count } }'
-    ).get("findGallery", {}).get("image_count")
-    api_key = config.get("general", {}).get("apiKey")
-
-    # choose random 10 images and generate tags
-    images = []
-    for image_id in random.choices(list(range(image_count)), k=min(10, image_count)):
-        resp = requests.get(
-            url=urljoin(BASE_URL, f"/gallery/{gallery_id}/preview/{image_id}"),
-            headers={"ApiKey": api_key}
-        )
-        if resp.status_code != 200:
-            continue
-        images.append(resp.content)
-    session, tags_df = load()
-    res = predict(session, tags_df, images)
+
+    try:
+        res = tag_remote(gallery_id)
+    except requests.ConnectionError:
+        # no resident server, load the model in this process
+        from model import load, infer
+        from tagger import tag_gallery
+        session, tags = load()
+        res, _ = tag_gallery(gallery_id, tags, lambda imgs: infer(session, imgs))
     scraped_tags: list[ScrapedTag] = [ScrapedTag(name=t[0]) for t in res]
 
     print(json.dumps(ScrapedGallery(tags=scraped_tags), ensure_ascii=False))
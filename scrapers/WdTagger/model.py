@@ -1,93 +1,225 @@
+import csv
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import cache
 from io import BytesIO
 from pathlib import Path
-from collections import defaultdict
+from typing import Iterable, Optional
 import numpy as np
 import onnxruntime as ort
-import pandas as pd
 from PIL import Image
 from huggingface_hub import hf_hub_download
-from config import MODEL, TAG, PREDICT_THRESHOLD
+from config import MODEL, TAG, PREDICT_THRESHOLD, PREPROCESS_WORKERS, QUANTIZE, INTRA_OP_THREADS, INTER_OP_THREADS
 
 IMAGE_SIZE = 448
 
 
-def load() -> tuple[ort.InferenceSession, pd.DataFrame]:
-    # load model
+@dataclass
+class Tags:
+    names: np.ndarray  # tag name per model output
+    general: np.ndarray  # True where the tag is of the general category (0)
+
+
+def model_id(quantize: bool = QUANTIZE) -> str:
+    """Identifies the model producing the outputs, cached predictions of other models are not used."""
+    return f"{MODEL}:int8" if quantize else MODEL
+
+
+def quantized(model_file: Path) -> Path:
+    """INT8 dynamically quantized copy of the model, created once next to the original."""
+    quantized_file = model_file.with_name(f"{model_file.stem}.int8.onnx")
+    if not quantized_file.is_file():
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        tmp_file = quantized_file.with_name(f"{quantized_file.name}.tmp")
+        quantize_dynamic(model_file, tmp_file, weight_type=QuantType.QUInt8)
+        tmp_file.replace(quantized_file)
+    return quantized_file
+
+
+def load_session(quantize: bool = QUANTIZE, cpu_only: bool = False) -> ort.InferenceSession:
+    """The fp32 model runs on CUDA when available unless `cpu_only` is set, the quantized model always on the CPU."""
     if MODEL:
-        model_file = Path(MODEL) if Path(MODEL).is_file() else hf_hub_download(MODEL, "model.onnx")
+        model_file = Path(MODEL) if Path(MODEL).is_file() else Path(hf_hub_download(MODEL, "model.onnx"))
     else:
         raise FileNotFoundError("Model file not found and huggingface_hub is not installed.")
-    session = ort.InferenceSession(
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = INTRA_OP_THREADS
+    options.inter_op_num_threads = INTER_OP_THREADS
+    if not quantize:
+        return ort.InferenceSession(
+            path_or_bytes=model_file,
+            sess_options=options,
+            providers=["CPUExecutionProvider"] if cpu_only else ["CUDAExecutionProvider", "CPUExecutionProvider"],
+        )
+
+    # CPU fast path: the quantized model is optimized once and the optimized graph is saved for later runs
+    model_file = quantized(model_file)
+    optimized_file = model_file.with_name(f"{model_file.stem}.opt.onnx")
+    if optimized_file.is_file():
+        model_file = optimized_file
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+    else:
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.optimized_model_filepath = str(optimized_file)
+    return ort.InferenceSession(
         path_or_bytes=model_file,
-        providers=["CUDAExecutionProvider", "CPUExecutionProvider"],
+        sess_options=options,
+        providers=["CPUExecutionProvider"],
     )
-    # load tags
+
+
+def compile_tags(tag_file: Path) -> Tags:
+    """Read the tag CSV into arrays, saved next to it so that later runs memory-map them instead of parsing."""
+    names_file = tag_file.with_name(f"{tag_file.stem}.names.npy")
+    general_file = tag_file.with_name(f"{tag_file.stem}.general.npy")
+    mtime = tag_file.stat().st_mtime
+    if all(f.is_file() and f.stat().st_mtime >= mtime for f in (names_file, general_file)):
+        return Tags(names=np.load(names_file, mmap_mode="r"), general=np.load(general_file, mmap_mode="r"))
+
+    with open(tag_file, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    tags = Tags(
+        names=np.array([row["name"] for row in rows], dtype=str),
+        general=np.array([row["category"] == "0" for row in rows], dtype=bool),
+    )
+    try:
+        for file, array in ((names_file, tags.names), (general_file, tags.general)):
+            tmp_file = file.with_name(f"{file.name}.tmp")
+            with open(tmp_file, "wb") as f:
+                np.save(f, array)
+            tmp_file.replace(file)
+    except OSError:
+        pass  # read-only location, parse the CSV again next time
+    return tags
+
+
+@cache
+def load_tags() -> Tags:
     if TAG:
-        tag_file = Path(TAG) if Path(TAG).is_file() else hf_hub_download(TAG, "selected_tags.csv")
-        tags_df = pd.read_csv(tag_file)
+        tag_file = Path(TAG) if Path(TAG).is_file() else Path(hf_hub_download(TAG, "selected_tags.csv"))
+        return compile_tags(tag_file)
     else:
         raise FileNotFoundError("Tag file not found and huggingface_hub is not installed.")
-    return session, tags_df
+
+
+def load() -> tuple[ort.InferenceSession, Tags]:
+    return load_session(), load_tags()
+
+
+def decode(raw_img: str | Path | bytes) -> np.ndarray:
+    """Decode an image and resize it to fit in `IMAGE_SIZE` with aspect ratio, as an RGB uint8 array."""
+    if isinstance(raw_img, (str, Path)):
+        img = Image.open(raw_img)
+    elif isinstance(raw_img, bytes):
+        img = Image.open(BytesIO(raw_img))
+    else:
+        raise ValueError(f"Unsupported image type. {type(raw_img)}")
+    # let the JPEG decoder scale large images down while decoding instead of decoding the full resolution
+    img.draft(None, (IMAGE_SIZE * 2, IMAGE_SIZE * 2))
+    img = img.convert("RGB")
+    # resize with aspect ratio
+    w, h = img.size
+    scale = min(IMAGE_SIZE / w, IMAGE_SIZE / h)
+    new_w, new_h = int(w * scale), int(h * scale)
+    img = img.resize((new_w, new_h), Image.BICUBIC, reducing_gap=3.0)
+    return np.asarray(img)
+
+
+def place(img_array: np.ndarray, out: np.ndarray):
+    """Write a decoded image centered on a white square canvas into `out` as BGR float32."""
+    h, w = img_array.shape[:2]
+    top, left = (IMAGE_SIZE - h) // 2, (IMAGE_SIZE - w) // 2
+    out.fill(255)
+    out[top:top + h, left:left + w] = img_array[..., ::-1]  # RGB -> BGR
+
+
+@cache
+def preprocess_pool() -> Optional[ProcessPoolExecutor]:
+    return ProcessPoolExecutor(max_workers=PREPROCESS_WORKERS) if PREPROCESS_WORKERS > 0 else None
 
 
 def preprocess(image: list[str | Path | bytes] | str | Path | bytes) -> np.ndarray:
-    data = []
     if not isinstance(image, list):
         image = [image]
-    for raw_img in image:
-        if isinstance(raw_img, (str, Path)):
-            img = Image.open(raw_img).convert("RGB")
-        elif isinstance(raw_img, bytes):
-            img = Image.open(BytesIO(raw_img)).convert("RGB")
-        else:
-            raise ValueError(f"Unsupported image type. {type(raw_img)}")
-        # resize with aspect ratio
-        w, h = img.size
-        scale = min(IMAGE_SIZE / w, IMAGE_SIZE / h)
-        new_w, new_h = int(w * scale), int(h * scale)
-        img = img.resize((new_w, new_h), Image.BICUBIC)
-        # create a white background square canvas
-        new_img = Image.new("RGB", (IMAGE_SIZE, IMAGE_SIZE), (255, 255, 255))
-        # paste the resized image to center
-        new_img.paste(img, ((IMAGE_SIZE - new_w) // 2, (IMAGE_SIZE - new_h) // 2))
-        img_array = np.array(new_img, dtype=np.float32)
-        img_array = img_array[..., ::-1]  # RGB -> BGR
-        data.append(img_array)
-    return np.stack(data)
+    batch = np.empty((len(image), IMAGE_SIZE, IMAGE_SIZE, 3), dtype=np.float32)
+    pool = preprocess_pool()
+    for i, img_array in enumerate(pool.map(decode, image) if pool else map(decode, image)):
+        place(img_array, batch[i])
+    return batch
 
 
-def predict(
-        session: ort.InferenceSession,
-        tags_df: pd.DataFrame,
-        images: list[str | Path | bytes] | str | Path | bytes
-) -> list[tuple[str, float]]:
-    input_name = session.get_inputs()[0].name
-    label_name = session.get_outputs()[0].name
+def preprocess_iter(images: Iterable[str | Path | bytes], capacity: int = 16) -> tuple[np.ndarray, float, float]:
+    """
+    Preprocess images while they are still being produced, e.g. downloaded, so both overlap.
+    :param images:
+    :param capacity: number of images the batch buffer is allocated for, it grows when exceeded
+    :return: the batch, the seconds spent waiting for images and the seconds spent preprocessing
+    """
+    batch = np.empty((capacity, IMAGE_SIZE, IMAGE_SIZE, 3), dtype=np.float32)
+    count = 0
+    pool = preprocess_pool()
+    futures = []
+
+    def put(img_array: np.ndarray):
+        nonlocal batch, count
+        if count == len(batch):
+            grown = np.empty((max(2 * count, 1), IMAGE_SIZE, IMAGE_SIZE, 3), dtype=np.float32)
+            grown[:count] = batch
+            batch = grown
+        place(img_array, batch[count])
+        count += 1
 
-    imgs = preprocess(images)
+    wait_time, preprocess_time = 0.0, 0.0
+    iterator = iter(images)
+    while True:
+        start = time.perf_counter()
+        raw_img = next(iterator, None)
+        wait_time += time.perf_counter() - start
+        if raw_img is None:
+            break
+        start = time.perf_counter()
+        if pool:
+            futures.append(pool.submit(decode, raw_img))
+        else:
+            put(decode(raw_img))
+        preprocess_time += time.perf_counter() - start
+    start = time.perf_counter()
+    for future in futures:
+        put(future.result())
+    preprocess_time += time.perf_counter() - start
+    return batch[:count], wait_time, preprocess_time
 
-    preds = session.run([label_name], {input_name: imgs})[0]
 
-    results: list[tuple[str, float]] = []
-    for i in range(len(images)):
-        probs = preds[i]
-        general_indices = np.where(probs > PREDICT_THRESHOLD)[0]
-        res_tags = tags_df.iloc[general_indices]
-        filtered_tags = res_tags[res_tags["category"] == 0]
-        filtered_probs = probs[general_indices][res_tags["category"] == 0]
-        tag_prob_pairs = list(zip(filtered_tags["name"], filtered_probs))
-        results.extend(tag_prob_pairs)
+def infer(session: ort.InferenceSession, imgs: np.ndarray) -> np.ndarray:
+    input_name = session.get_inputs()[0].name
+    label_name = session.get_outputs()[0].name
+    return session.run([label_name], {input_name: imgs})[0]
 
-    # 计算重复标签的概率均值
-    tag_sum = defaultdict(float)
-    tag_count = defaultdict(int)
-    for tag, prob in results:
-        tag_sum[tag] += prob
-        tag_count[tag] += 1
 
-    averaged_results = [(tag, tag_sum[tag] / tag_count[tag]) for tag in tag_sum]
+def postprocess(tags: Tags, preds: np.ndarray) -> list[tuple[str, float]]:
+    """
+    Average the probability of every general tag over the images it passes the threshold on,
+    sorted by probability in descending order.
+    """
+    present = (preds > PREDICT_THRESHOLD) & tags.general  # (images, tags)
+    counts = present.sum(axis=0)
+    indices = np.flatnonzero(counts)
+    if not len(indices):
+        return []
+    present = present[:, indices]
+    # cumulative sum adds the images in order, giving the same rounding as summing them one by one
+    sums = np.cumsum(np.where(present, preds[:, indices], 0), axis=0)[-1]
+    means = sums / counts[indices].astype(preds.dtype)
+    # ties keep the order in which the tags first appear
+    first_seen = present.argmax(axis=0)
+    order = np.lexsort((indices, first_seen, -means))
+    return [(str(tags.names[indices[i]]), float(means[i])) for i in order]
 
-    # 按概率降序排列
-    averaged_results.sort(key=lambda x: x[1], reverse=True)
 
-    return averaged_results
+def predict(
+        session: ort.InferenceSession,
+        tags: Tags,
+        images: list[str | Path | bytes] | str | Path | bytes
+) -> list[tuple[str, float]]:
+    return postprocess(tags, infer(session, preprocess(images)))
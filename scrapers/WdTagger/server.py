@@ -0,0 +1,49 @@
+import base64
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config import SERVER_HOST, SERVER_PORT
+from py_common import log
+from tagger import Batcher, tag_gallery, tag_images
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    batcher: Batcher
+
+    def do_POST(self):
+        """
+        `POST /tag` with either `{"gallery_id": "1"}` or `{"images": ["<base64>", ...]}`,
+        answers `{"tags": [["tag", 0.9], ...]}`.
+        """
+        if self.path != "/tag":
+            self.send_error(404)
+            return
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            if body.get("gallery_id"):
+                res, _ = tag_gallery(body["gallery_id"], self.batcher.tags, self.batcher.infer)
+            else:
+                images = (base64.b64decode(image) for image in body.get("images", []))
+                res = tag_images(images, self.batcher.tags, self.batcher.infer)
+            tags = [(name, float(prob)) for name, prob in res]
+        except Exception as e:
+            log.error(f"Failed to tag images: {e!r}")
+            self.send_error(500, explain=repr(e))
+            return
+        data = json.dumps({"tags": tags}, ensure_ascii=False).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        log.debug(format % args)
+
+
+def serve():
+    """Keep the model loaded and answer tagging requests until interrupted."""
+    RequestHandler.batcher = Batcher()
+    with ThreadingHTTPServer((SERVER_HOST, SERVER_PORT), RequestHandler) as server:
+        log.info(f"WdTagger listening on http://{SERVER_HOST}:{SERVER_PORT}")
+        server.serve_forever()
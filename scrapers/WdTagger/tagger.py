@@ -0,0 +1,138 @@
+import hashlib
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from functools import cache
+from typing import Callable, Iterable, Iterator, Optional
+
+import numpy as np
+
+from cache import PredictionCache
+from config import EARLY_STOP_STEP, PREDICTION_CACHE, MAX_BATCH_SIZE, BATCH_WAIT
+from gallery import preview_urls, iter_previews
+from model import Tags, load, model_id, preprocess_iter, infer, postprocess
+from py_common import log
+
+
+class Batcher:
+    """Collects the images of concurrent callers and runs them through the model in a single `session.run`."""
+
+    def __init__(self):
+        self.session, self.tags = load()
+        self.queue: queue.Queue[tuple[np.ndarray, Future]] = queue.Queue()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def infer(self, imgs: np.ndarray) -> np.ndarray:
+        future: Future = Future()
+        self.queue.put((imgs, future))
+        return future.result()
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            size = len(batch[0][0])
+            deadline = time.monotonic() + BATCH_WAIT
+            while size < MAX_BATCH_SIZE:
+                try:
+                    item = self.queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                batch.append(item)
+                size += len(item[0])
+
+            start = time.perf_counter()
+            try:
+                preds = infer(self.session, np.concatenate([imgs for imgs, _ in batch]))
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            log.debug(f"inference of {size} images from {len(batch)} callers: {time.perf_counter() - start:.3f}s")
+            offset = 0
+            for imgs, future in batch:
+                future.set_result(preds[offset:offset + len(imgs)])
+                offset += len(imgs)
+
+
+@cache
+def prediction_cache() -> Optional[PredictionCache]:
+    return PredictionCache(PREDICTION_CACHE, model_id()) if PREDICTION_CACHE else None
+
+
+def run(
+        images: Iterable[bytes],
+        tags: Tags,
+        infer: Callable[[np.ndarray], np.ndarray]
+) -> np.ndarray:
+    """
+    Model outputs of the images in their order, only running the model on images missing from the prediction cache.
+    """
+    pred_cache = prediction_cache()
+    cached: list[Optional[np.ndarray]] = []  # per image, None for the ones run through the model
+    miss_digests: list[str] = []
+
+    def misses() -> Iterator[bytes]:
+        for image in images:
+            if pred_cache:
+                digest = hashlib.sha256(image).hexdigest()
+                probs = pred_cache.get(digest)
+                if probs is not None:
+                    cached.append(probs)
+                    continue
+                miss_digests.append(digest)
+            cached.append(None)
+            yield image
+
+    imgs, download_time, preprocess_time = preprocess_iter(misses())
+    start = time.perf_counter()
+    preds = infer(imgs) if len(imgs) else np.empty((0, len(tags.names)), dtype=np.float32)
+    inference_time = time.perf_counter() - start
+    if pred_cache and len(preds):
+        pred_cache.put_many(list(zip(miss_digests, preds)))
+    log.debug(f"cached: {len(cached) - len(imgs)}, download: {download_time:.3f}s, "
+              f"preprocess: {preprocess_time:.3f}s, inference of {len(imgs)}: {inference_time:.3f}s")
+    if len(imgs) == len(cached):
+        return preds
+    fresh = iter(preds)
+    return np.stack([probs if probs is not None else next(fresh) for probs in cached])
+
+
+def tag_images(
+        images: Iterable[bytes],
+        tags: Tags,
+        infer: Callable[[np.ndarray], np.ndarray]
+) -> list[tuple[str, float]]:
+    return postprocess(tags, run(images, tags, infer))
+
+
+def tag_gallery(
+        gallery_id: str,
+        tags: Tags,
+        infer: Callable[[np.ndarray], np.ndarray],
+        image_count: Optional[int] = None
+) -> tuple[list[tuple[str, float]], int]:
+    """
+    Tag the sampled previews of a gallery. With `EARLY_STOP_STEP` set, previews are tagged that many at a time
+    and sampling stops once another step no longer changes the set of tags.
+    Returns the tags and the number of previews they were computed from.
+    """
+    urls = preview_urls(gallery_id, image_count)
+    if EARLY_STOP_STEP <= 0:
+        preds = run(iter_previews(urls), tags, infer)
+        return postprocess(tags, preds), len(preds)
+
+    preds: list[np.ndarray] = []
+    res: list[tuple[str, float]] = []
+    for step_start in range(0, len(urls), EARLY_STOP_STEP):
+        step_preds = run(iter_previews(urls[step_start:step_start + EARLY_STOP_STEP]), tags, infer)
+        if not len(step_preds):
+            continue
+        preds.append(step_preds)
+
+        previous = {name for name, _ in res}
+        res = postprocess(tags, np.concatenate(preds))
+        if len(preds) > 1 and {name for name, _ in res} == previous:
+            log.debug(f"tags stable after {step_start + len(step_preds)} of {len(urls)} previews")
+            break
+    return res, sum(map(len, preds))
@@ -0,0 +1,113 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+# request headers that change the content of the response and therefore belong to the cache key
+KEY_HEADERS = ("accept", "accept-language")
+
+
+def cache_key(method: str, url: str, headers: Optional[dict] = None, body: str = "") -> str:
+    headers = {k.lower(): v for k, v in (headers or {}).items()}
+    parts = [method.upper(), url] + [f"{h}:{headers.get(h, '')}" for h in KEY_HEADERS] + [body]
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CachedResponse:
+    url: str
+    status_code: int
+    headers: dict[str, str]
+    content: bytes
+    stored_at: float
+
+    @property
+    def etag(self) -> Optional[str]:
+        return CaseInsensitiveDict(self.headers).get("etag")
+
+    @property
+    def last_modified(self) -> Optional[str]:
+        return CaseInsensitiveDict(self.headers).get("last-modified")
+
+    def is_fresh(self, ttl: float) -> bool:
+        return time.time() - self.stored_at < ttl
+
+    def to_response(self) -> requests.Response:
+        resp = requests.Response()
+        resp.url = self.url
+        resp.status_code = self.status_code
+        resp.headers = CaseInsensitiveDict(self.headers)
+        resp.encoding = get_encoding_from_headers(resp.headers)
+        resp._content = self.content
+        return resp
+
+
+class ResponseCache:
+    """
+    SQLite backed HTTP response cache shared by all scraper processes.
+    Entries are evicted in least-recently-used order once the total size exceeds `max_size` bytes.
+    """
+
+    def __init__(self, path: Path, max_size: int):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, url TEXT, status INTEGER, headers TEXT, content BLOB, "
+            "size INTEGER, stored_at REAL, accessed_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, status, headers, content, stored_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        url, status, headers, content, stored_at = row
+        return CachedResponse(
+            url=url, status_code=status, headers=json.loads(headers), content=content, stored_at=stored_at
+        )
+
+    def put(self, key: str, resp: requests.Response):
+        now = time.time()
+        # the body is stored decoded, so the transfer headers no longer apply to it
+        headers = {
+            k: v for k, v in resp.headers.items()
+            if k.lower() not in ("content-encoding", "content-length", "transfer-encoding")
+        }
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, resp.url, resp.status_code, json.dumps(headers), resp.content, len(resp.content), now, now)
+            )
+            self._evict()
+
+    def refresh(self, key: str):
+        """Mark an entry as fresh again after the server answered `304 Not Modified`."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("UPDATE responses SET stored_at = ?, accessed_at = ? WHERE key = ?", (now, now, key))
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_size:
+            return
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall():
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_size:
+                break
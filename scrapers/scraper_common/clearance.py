@@ -0,0 +1,113 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows, the store is only locked between the threads of a process
+    fcntl = None
+
+import requests
+
+CLEARANCE_COOKIE = "cf_clearance"
+
+
+class ClearanceStore:
+    """
+    Cloudflare clearance cookies of a domain persisted to disk, together with the user agent they were issued to,
+    so that later runs reuse them instead of solving the challenge again.
+    Also counts how often a clearance was solved and how often a stored one was reused by a later run.
+    """
+
+    def __init__(self, directory: Path, domain: str):
+        self.path = directory / f"{domain}.json"
+        self._lock = threading.Lock()
+        self._restored: Optional[str] = None  # the clearance `load` restored, until a request accepted or replaced it
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Serialize updates between the threads of this process and, with `fcntl`, the other scraper processes."""
+        with self._lock:
+            if not fcntl:
+                yield
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path.with_suffix(".lock"), "a+") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)  # released when the file is closed
+                yield
+
+    def _read(self) -> dict:
+        try:
+            return json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, data: dict):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(data), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return self._read().get("stats", {"solved": 0, "reused": 0})
+
+    def load(self, client: requests.Session):
+        """Restore the unexpired cookies and the matching user agent into `client`."""
+        data = self._read()
+        now = time.time()
+        cookies = [c for c in data.get("cookies", []) if not c.get("expires") or c["expires"] > now]
+        if not any(c["name"] == CLEARANCE_COOKIE for c in cookies):
+            return
+        if data.get("user_agent"):
+            client.headers["User-Agent"] = data["user_agent"]
+        for c in cookies:
+            client.cookies.set(
+                c["name"], c["value"], domain=c["domain"], path=c["path"], expires=c["expires"], secure=c["secure"]
+            )
+        self._restored = self.clearance(client)
+
+    @staticmethod
+    def clearance(client: requests.Session) -> Optional[str]:
+        for cookie in client.cookies:
+            if cookie.name == CLEARANCE_COOKIE and not cookie.is_expired():
+                return cookie.value
+        return None
+
+    def record(self, client: requests.Session, before: Optional[str]):
+        """
+        Update the store after a request. Nothing is written unless the site issued a new clearance,
+        or the clearance restored by `load` was accepted, which counts as one reuse for the whole run.
+        :param client:
+        :param before: the clearance cookie value before the request
+        :return:
+        """
+        after = self.clearance(client)
+        if after is None:  # the site did not challenge
+            return
+        if after == before != self._restored:  # known to this run, and already counted or never stored
+            return
+        with self._locked():
+            reused = after == before
+            if reused and self._restored is None:  # another thread counted it meanwhile
+                return
+            self._restored = None
+            data = self._read()
+            stats = data.setdefault("stats", {"solved": 0, "reused": 0})
+            if reused:
+                stats["reused"] += 1
+            else:
+                stats["solved"] += 1
+                data["user_agent"] = client.headers.get("User-Agent")
+                data["cookies"] = [
+                    {
+                        "name": c.name, "value": c.value, "domain": c.domain, "path": c.path,
+                        "expires": c.expires, "secure": c.secure,
+                    }
+                    for c in client.cookies
+                ]
+            self._write(data)
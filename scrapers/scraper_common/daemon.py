@@ -0,0 +1,73 @@
+import json
+import os
+import socket
+import socketserver
+from pathlib import Path
+from typing import Any, Callable
+
+
+class DaemonUnavailable(Exception):
+    pass
+
+
+class DaemonError(Exception):
+    pass
+
+
+def forward(socket_path: Path, timeout: float, mode: str, info: dict) -> Any:
+    """
+    Run `mode` in the resident scraper process.
+    Raises `DaemonUnavailable` if it is not running, so the caller can fall back to in-process execution,
+    and `DaemonError` if it failed or did not answer once the request was sent.
+    """
+    if not hasattr(socket, "AF_UNIX") or not socket_path.exists():
+        raise DaemonUnavailable()
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        try:
+            sock.connect(str(socket_path))
+        except OSError as e:  # a stale socket file, or the daemon is shutting down
+            raise DaemonUnavailable() from e
+        # from here on the daemon may already be scraping, so running the mode again in-process would duplicate it
+        try:
+            sock.sendall(json.dumps({"mode": mode, "info": info}).encode("utf-8") + b"\n")
+            with sock.makefile("rb") as f:
+                line = f.readline()
+        except OSError as e:
+            raise DaemonError(f"{mode} failed: {e!r}") from e
+    if not line:
+        raise DaemonError(f"{mode} failed: the resident process closed the connection without a reply")
+
+    reply = json.loads(line)
+    if "error" in reply:
+        raise DaemonError(reply["error"])
+    return reply["result"]
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        request = json.loads(self.rfile.readline())
+        try:
+            reply = {"result": self.server.modes[request["mode"]](request["info"])}
+        except (Exception, SystemExit) as e:  # scrapers exit on errors, which must not stop the daemon
+            reply = {"error": f"{request.get('mode')} failed: {e!r}"}
+        self.wfile.write(json.dumps(reply, ensure_ascii=False).encode("utf-8") + b"\n")
+
+
+def serve(socket_path: Path, modes: dict[str, Callable[[dict], Any]]):
+    """Answer requests forwarded by `main.py` until interrupted, keeping scrapers and their sessions alive."""
+    if not hasattr(socket, "AF_UNIX"):
+        raise OSError("Unix sockets are not supported on this platform")
+
+    class Server(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+
+    socket_path.parent.mkdir(parents=True, exist_ok=True)
+    socket_path.unlink(missing_ok=True)
+    with Server(str(socket_path), _RequestHandler) as server:
+        server.modes = modes
+        os.chmod(socket_path, 0o600)
+        try:
+            server.serve_forever()
+        finally:
+            socket_path.unlink(missing_ok=True)
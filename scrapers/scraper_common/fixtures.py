@@ -0,0 +1,45 @@
+import json
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlsplit
+
+import requests
+
+from .cache import CachedResponse
+
+
+class FixtureStore:
+    """
+    Recorded HTTP responses, one metadata JSON and one body file per request, grouped by host.
+    Lets the scrapers run against saved pages instead of the live sites.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+
+    def _paths(self, url: str, key: str) -> tuple[Path, Path]:
+        host_dir = self.directory / (urlsplit(url).hostname or "unknown")
+        return host_dir / f"{key}.json", host_dir / f"{key}.body"
+
+    def load(self, url: str, key: str) -> Optional[CachedResponse]:
+        meta_file, body_file = self._paths(url, key)
+        if not meta_file.is_file():
+            return None
+        meta = json.loads(meta_file.read_text(encoding="utf-8"))
+        return CachedResponse(
+            url=meta["url"], status_code=meta["status"], headers=meta["headers"],
+            content=body_file.read_bytes(), stored_at=0
+        )
+
+    def save(self, url: str, key: str, resp: requests.Response):
+        meta_file, body_file = self._paths(url, key)
+        meta_file.parent.mkdir(parents=True, exist_ok=True)
+        headers = {
+            k: v for k, v in resp.headers.items()
+            if k.lower() not in ("content-encoding", "content-length", "transfer-encoding", "set-cookie")
+        }
+        body_file.write_bytes(resp.content)
+        meta_file.write_text(
+            json.dumps({"url": resp.url, "status": resp.status_code, "headers": headers}, indent=2, ensure_ascii=False),
+            encoding="utf-8"
+        )
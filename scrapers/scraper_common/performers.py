@@ -0,0 +1,106 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional
+from urllib.parse import urlsplit
+
+import requests
+
+
+def canonical_url(url: str) -> str:
+    """The same page regardless of scheme, `www.`, trailing slash and fragment."""
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").removeprefix("www.")
+    path = parts.path.rstrip("/")
+    return f"{host}{path}?{parts.query}" if parts.query else f"{host}{path}"
+
+
+class PerformerStore:
+    """
+    Parsed performers keyed by canonical URL, in a SQLite file shared by all scrapers, so that a performer is fetched
+    at most once per `ttl` seconds. Pages that answered 404 are remembered for `negative_ttl` seconds.
+    Also counts hits and misses.
+    """
+
+    def __init__(self, path: Path, ttl: float, negative_ttl: float):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # `performer` is NULL for pages that were not found
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS performers (url TEXT PRIMARY KEY, performer TEXT, stored_at REAL)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, count INTEGER)")
+
+    @property
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT name, count FROM stats").fetchall())
+        return {name: counts.get(name, 0) for name in ("hits", "negative_hits", "misses")}
+
+    def _count(self, name: str):
+        self._conn.execute(
+            "INSERT INTO stats VALUES (?, 1) ON CONFLICT (name) DO UPDATE SET count = count + 1", (name,)
+        )
+
+    def _lookup(self, key: str) -> tuple[bool, Optional[dict]]:
+        """`(True, performer)` if stored, `(True, None)` for a remembered 404 and `(False, None)` otherwise."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT performer, stored_at FROM performers WHERE url = ?", (key,)).fetchone()
+            if row and row[0] is not None and now - row[1] < self.ttl:
+                self._count("hits")
+                return True, json.loads(row[0])
+            if row and row[0] is None and now - row[1] < self.negative_ttl:
+                self._count("negative_hits")
+                return True, None
+            self._count("misses")
+        return False, None
+
+    def _store(self, key: str, performer: Optional[dict]):
+        data = json.dumps(performer, ensure_ascii=False) if performer is not None else None
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO performers VALUES (?, ?, ?)", (key, data, time.time()))
+
+    def get_or_fetch(self, url: str, fetch: Callable[[str], dict]) -> dict:
+        """
+        Return the stored performer of `url`, or call `fetch(url)` and store its result.
+        A 404 from `fetch` is stored as well and raised again without fetching while it is remembered.
+        """
+        key = canonical_url(url)
+        found, performer = self._lookup(key)
+        if found and performer is None:
+            raise requests.HTTPError(f"404 Client Error: Not Found for url: {url} (cached)")
+        if found:
+            return performer
+
+        try:
+            performer = fetch(url)
+        except requests.HTTPError as e:
+            if e.response is not None and e.response.status_code == 404:
+                self._store(key, None)
+            raise
+        self._store(key, performer)
+        return performer
+
+    def get_or_fetch_many(
+            self,
+            urls: list[str],
+            fetch_many: Callable[[list[str]], dict[str, dict]]
+    ) -> list[Optional[dict]]:
+        """
+        Like `get_or_fetch` for many URLs, with a single `fetch_many` call for all the ones not stored,
+        which returns their performers by URL. URLs missing from its result are remembered as not found.
+        Returns the performers in the order of `urls`, None for the ones that were not found.
+        """
+        found = {url: self._lookup(canonical_url(url)) for url in urls}
+        missing = [url for url, (stored, _) in found.items() if not stored]
+        fetched = fetch_many(missing) if missing else {}
+        for url in missing:
+            self._store(canonical_url(url), fetched.get(url))
+        return [found[url][1] if found[url][0] else fetched.get(url) for url in urls]
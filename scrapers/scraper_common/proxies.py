@@ -0,0 +1,75 @@
+import os
+import threading
+from functools import cache
+from typing import Optional
+from urllib.parse import urlsplit
+from urllib.request import getproxies, proxy_bypass
+
+import requests
+from requests.auth import AuthBase, HTTPBasicAuth
+from requests.utils import get_netrc_auth
+
+
+@cache
+def system_proxies() -> dict[str, str]:
+    """The proxies of the environment and the OS settings, resolved once per process."""
+    return {scheme: url for scheme, url in getproxies().items() if scheme in ("http", "https", "all")}
+
+
+class ProxyRouter:
+    """
+    Picks the proxies to send requests through per host, from `routes` mapping a domain (or "default") to
+    "system" for the environment/OS proxies, a proxy URL, or None for a direct connection.
+    """
+
+    def __init__(self, routes: dict[str, Optional[str]]):
+        self.routes = routes
+        self._proxies: dict[str, dict[str, str]] = {}
+        self._lock = threading.Lock()
+
+    def for_url(self, url: str) -> dict[str, str]:
+        """
+        The proxies for the host of `url`.
+        Resolved once per host, and the same dict is returned every time so connections to a proxy are reused.
+        """
+        host = urlsplit(url).hostname or ""
+        with self._lock:
+            if host not in self._proxies:
+                route = self.routes.get(host.removeprefix("www."), self.routes["default"])
+                if route == "system":
+                    self._proxies[host] = {} if proxy_bypass(host) else system_proxies()
+                elif route:
+                    self._proxies[host] = {"http": route, "https": route}
+                else:
+                    self._proxies[host] = {}
+            return self._proxies[host]
+
+
+class NetrcAuth(AuthBase):
+    """Basic auth from the netrc file, looked up once per host instead of on every request."""
+
+    def __init__(self):
+        self._hosts: dict[str, Optional[tuple[str, str]]] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, request: requests.PreparedRequest) -> requests.PreparedRequest:
+        host = urlsplit(request.url).hostname or ""
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = get_netrc_auth(request.url)
+            auth = self._hosts[host]
+        return HTTPBasicAuth(*auth)(request) if auth else request
+
+
+def disable_trust_env(session: requests.Session):
+    """
+    Stop `session` from reading the environment on every request, proxies are then passed by `ProxyRouter`.
+    The CA bundle (`REQUESTS_CA_BUNDLE`, `CURL_CA_BUNDLE`) and netrc credentials it would have picked up
+    are applied once here instead.
+    """
+    session.trust_env = False
+    ca_bundle = os.environ.get("REQUESTS_CA_BUNDLE") or os.environ.get("CURL_CA_BUNDLE")
+    if ca_bundle and session.verify is True:
+        session.verify = ca_bundle
+    if session.auth is None:
+        session.auth = NetrcAuth()
@@ -0,0 +1,83 @@
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlsplit
+
+try:
+    import fcntl
+except ImportError:  # Windows, buckets are only shared between the threads of a process
+    fcntl = None
+
+
+class TokenBucket:
+    """
+    Allows `rate` requests per second on average and bursts of up to `burst` requests.
+    With `path`, the bucket is kept in a lock file and shared by every process using the same path.
+    """
+
+    def __init__(self, rate: float, burst: int, path: Optional[Path] = None):
+        self.rate = rate
+        self.burst = burst
+        self.path = path if fcntl else None
+        self._lock = threading.Lock()
+        self._tokens, self._updated = float(burst), time.time()
+
+    def _take(self, tokens: float, updated: float) -> tuple[float, float, float]:
+        """Refill and take a token, returning the new state and the seconds to wait if none was available."""
+        now = time.time()
+        tokens = min(self.burst, tokens + max(now - updated, 0) * self.rate)
+        if tokens >= 1:
+            return tokens - 1, now, 0.0
+        return tokens, now, (1 - tokens) / self.rate
+
+    def _take_shared(self) -> float:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a+", encoding="utf-8") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)  # released when the file is closed
+            f.seek(0)
+            try:
+                state = json.loads(f.read())
+                tokens, updated = state["tokens"], state["updated"]
+            except (ValueError, KeyError):
+                tokens, updated = float(self.burst), time.time()
+            tokens, updated, wait = self._take(tokens, updated)
+            f.seek(0)
+            f.truncate()
+            f.write(json.dumps({"tokens": tokens, "updated": updated}))
+        return wait
+
+    def acquire(self):
+        """Block until a request may be sent."""
+        while True:
+            with self._lock:
+                if self.path:
+                    wait = self._take_shared()
+                else:
+                    self._tokens, self._updated, wait = self._take(self._tokens, self._updated)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+
+class RateLimiter:
+    """
+    One token bucket per host, with the `(rate, burst)` of its domain in `limits` or of "default".
+    The buckets are kept in `directory` and shared with the other scraper processes.
+    """
+
+    def __init__(self, limits: dict[str, tuple[float, int]], directory: Path):
+        self.limits = limits
+        self.directory = directory
+        self._buckets: dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def for_url(self, url: str) -> TokenBucket:
+        """Get the token bucket pacing the requests to the host of `url`."""
+        host = (urlsplit(url).hostname or "").removeprefix("www.")
+        with self._lock:
+            if host not in self._buckets:
+                rate, burst = self.limits.get(host, self.limits["default"])
+                self._buckets[host] = TokenBucket(rate, burst, self.directory / f"{host}.json")
+            return self._buckets[host]
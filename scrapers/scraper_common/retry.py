@@ -0,0 +1,106 @@
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, ContextManager, Optional
+
+import requests
+
+from .ratelimit import TokenBucket
+
+# responses worth another try, the site is overloaded or asks us to slow down
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class FetchError(requests.HTTPError):
+    """A request that failed for good, after `attempts` tries. `status_code` is None if no response was received."""
+
+    def __init__(
+            self,
+            url: str,
+            status_code: Optional[int],
+            attempts: int,
+            response: Optional[requests.Response] = None
+    ):
+        reason = f"HTTP {status_code}" if status_code else "no response"
+        super().__init__(f"Failed to retrieve URL {url} ({reason} after {attempts} attempts)", response=response)
+        self.url = url
+        self.status_code = status_code
+        self.attempts = attempts
+
+
+def retry_after(resp: Optional[requests.Response]) -> Optional[float]:
+    """Seconds to wait according to the `Retry-After` header, given either in seconds or as an HTTP date."""
+    value = resp.headers.get("Retry-After") if resp is not None else None
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_delay(attempt: int, resp: Optional[requests.Response], backoff: float, max_delay: float) -> float:
+    """
+    Seconds to wait before retry number `attempt` (starting at 1): the server's `Retry-After` if it sent one,
+    otherwise an exponential backoff from `backoff` seconds with full jitter, both capped at `max_delay`.
+    """
+    delay = retry_after(resp)
+    if delay is None:
+        delay = random.uniform(0, backoff * 2 ** (attempt - 1))
+    return min(delay, max_delay)
+
+
+def _timeout(timeout: Optional[float], deadline: Optional[float]) -> Optional[float]:
+    """`timeout` capped to the seconds left before `deadline`, raising `requests.Timeout` once it has passed."""
+    if deadline is None:
+        return timeout
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise requests.Timeout("Deadline exceeded")
+    return min(timeout, remaining) if timeout is not None else remaining
+
+
+def send_with_retries(
+        url: str,
+        send: Callable[[Optional[float]], requests.Response],
+        bucket: TokenBucket,
+        slot: ContextManager,
+        max_retries: int,
+        backoff: float,
+        max_delay: float,
+        warn: Callable[[str], Any],
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None
+) -> tuple[requests.Response, int]:
+    """
+    Call `send` with the request timeout once `bucket` has a token and while holding `slot` (e.g. a per-host
+    semaphore), retrying 429/5xx responses and connection errors up to `max_retries` times after `retry_delay`.
+    Every retry is reported to `warn`. With `deadline` (a `time.monotonic()` value), the timeout of every attempt
+    is capped to the time left and no retry is made that would end after it.
+    Returns the last response and the number of attempts, raises `FetchError` if the last attempt got no response.
+    """
+    attempt = 0
+    while True:
+        attempt += 1
+        resp, error = None, None
+        bucket.acquire()
+        try:
+            with slot:
+                resp = send(_timeout(timeout, deadline))
+        except (requests.ConnectionError, requests.Timeout) as e:
+            error = e
+        else:
+            if resp.status_code not in RETRY_STATUSES:
+                return resp, attempt
+        delay = retry_delay(attempt, resp, backoff, max_delay)
+        if attempt > max_retries or (deadline is not None and time.monotonic() + delay >= deadline):
+            if resp is None:
+                raise FetchError(url, None, attempt) from error
+            return resp, attempt
+        if resp is not None:
+            resp.close()
+        reason = f"HTTP {resp.status_code}" if resp is not None else "no response"
+        warn(f"Retrying {url} in {delay:.1f}s ({reason})")
+        time.sleep(delay)
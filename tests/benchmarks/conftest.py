@@ -0,0 +1,62 @@
+"""
+Benchmarks of the scrapers on the saved pages and local data, timed by pytest-benchmark and skipped without it.
+Deselect them with `-m "not benchmark"`, compare runs with `--benchmark-autosave` and `--benchmark-compare`.
+"""
+import os
+import tracemalloc
+from typing import Any, Callable
+
+import pytest
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+@pytest.fixture
+def measure(benchmark):
+    """
+    `measure(fn, *args)` times `fn(*args)` with pytest-benchmark, and saves the peak memory allocated by one call,
+    traced by tracemalloc in a separate warmed-up run, to the `extra_info` of the benchmark.
+    """
+    def run(fn: Callable[..., Any], *args: Any) -> Any:
+        fn(*args)
+        tracemalloc.start()
+        try:
+            fn(*args)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        benchmark.extra_info["peak_kib"] = round(peak / 1024, 1)
+        return benchmark(fn, *args)
+
+    return run
+
+
+def _peak_rss_kib(fn: Callable[..., Any], *args: Any) -> int:
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            fn(*args)
+            os.write(write, str(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before).encode())
+        finally:
+            os._exit(0)
+    os.close(write)
+    os.waitpid(pid, 0)
+    with os.fdopen(read) as f:
+        return int(f.read() or 0)
+
+
+@pytest.fixture
+def peak_rss_kib():
+    """
+    `peak_rss_kib(fn, *args)` gives the KiB of resident memory `fn(*args)` adds at its peak, above the memory in use
+    when it starts. It runs in a forked child, so neither earlier tests nor allocations outside the Python heap
+    (e.g. decoded images) hide the peak.
+    """
+    if resource is None or not hasattr(os, "fork"):
+        pytest.skip("needs fork and resource")
+    return _peak_rss_kib
@@ -0,0 +1,94 @@
+"""Time and allocations of every GalleryScraper parser, per saved page."""
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+pytestmark = pytest.mark.benchmark
+
+GALLERY_HEADERS = {"accept-language": "zh-CN,zh;q=0.9"}
+
+MISSKON_POSTS = "https://misskon.com/wp-json/wp/v2/posts?include=101,102&per_page=100&_fields=id,title,content,tags"
+MISSKON_TAGS = "https://misskon.com/wp-json/wp/v2/tags?include=7,8,9&per_page=100&_fields=id,name,link"
+GDATA_BODY = '{"gidlist": [[618395, "0439fa3666"]], "method": "gdata", "namespace": 1}'
+
+
+@pytest.fixture(scope="module")
+def handlers(load_scraper):
+    pytest.importorskip("py_common")
+    handlers, = load_scraper("GalleryScraper", "handlers")
+    return handlers
+
+
+@pytest.fixture(scope="module")
+def scrapers(handlers):
+    import scrapers
+    return scrapers
+
+
+def test_v2ph_performer(handlers, replay, measure):
+    url = "https://v2ph.com/actor/xiaomei.html"
+    replay(url, "v2ph.com/actor.html", headers=GALLERY_HEADERS)
+    measure(handlers.performer_by_url, {"url": url})
+
+
+def test_v2ph_gallery(handlers, replay, measure):
+    url = "https://v2ph.com/album/vol-123.html"
+    replay(url, "v2ph.com/album.html", headers=GALLERY_HEADERS)
+    replay("https://v2ph.com/actor/xiaomei.html", "v2ph.com/actor.html", headers=GALLERY_HEADERS)
+    measure(handlers.gallery_by_url, {"url": url})
+
+
+def test_v2ph_search(handlers, scrapers, replay, measure):
+    replay("https://www.v2ph.com/search/?q=小美", "v2ph.com/search.html", headers=GALLERY_HEADERS)
+    measure(handlers.get_scraper(scrapers.V2PH).parse_performer_by_name, {"name": "小美"})
+
+
+def test_xchina_performer(handlers, replay, measure):
+    url = "https://xchina.co/model/id-1.html"
+    replay(url, "xchina.co/model.html", headers=GALLERY_HEADERS)
+    measure(handlers.performer_by_url, {"url": url})
+
+
+def test_xchina_search(handlers, scrapers, replay, measure):
+    replay("https://xchina.co/models/keyword-小美.html", "xchina.co/search.html", headers=GALLERY_HEADERS)
+    measure(handlers.get_scraper(scrapers.XChina).parse_performer_by_name, {"name": "小美"})
+
+
+def test_galleryepic_performer(handlers, replay, measure):
+    url = "https://galleryepic.com/zh/coser/101"
+    replay(url, "galleryepic.com/coser.html")
+    measure(handlers.performer_by_url, {"url": url})
+
+
+def test_galleryepic_album(handlers, replay, measure):
+    url = "https://galleryepic.com/zh/album/555"
+    replay(url, "galleryepic.com/album.html")
+    replay("https://galleryepic.com/zh/model/101", "galleryepic.com/coser.html")
+    measure(handlers.gallery_by_url, {"url": url})
+
+
+def test_galleryepic_search(handlers, scrapers, replay, measure):
+    replay("https://galleryepic.com/zh/cosers/1?coserName=小美", "galleryepic.com/search.html")
+    measure(handlers.get_scraper(scrapers.GalleryEpic).parse_performer_by_name, {"name": "小美"})
+
+
+def test_misskon_galleries(handlers, scrapers, replay, measure):
+    replay(MISSKON_POSTS, "misskon.com/posts.json")
+    replay(MISSKON_TAGS, "misskon.com/tags.json")
+    infos = [{"url": "https://misskon.com/101-xiuren-vol-1/"}, {"url": "https://misskon.com/102-xiuren-vol-2/"}]
+    measure(handlers.get_scraper(scrapers.MissKon).parse_galleries_by_url, infos)
+
+
+def test_ehentai_galleries(handlers, scrapers, replay, measure):
+    replay("https://api.e-hentai.org/api.php", "e-hentai.org/gdata.json", method="post", body=GDATA_BODY)
+    infos = [{"url": "https://e-hentai.org/g/618395/0439fa3666/"}]
+    measure(handlers.get_scraper(scrapers.EHentai).parse_galleries_by_url, infos)
+
+
+def test_ehentai_gallery_page(handlers, scrapers, replay, measure):
+    url = "https://e-hentai.org/g/1/badtoken/"
+    replay(url, "e-hentai.org/gallery.html", headers=GALLERY_HEADERS)
+    replay(
+        "https://e-hentai.org/gallerytorrents.php?gid=1&t=badtoken", "e-hentai.org/torrents.html",
+        headers=GALLERY_HEADERS
+    )
+    measure(handlers.get_scraper(scrapers.EHentai).parse_gallery_page, {"url": url})
@@ -0,0 +1,40 @@
+"""
+Tree building time of the saved pages: html.parser on the whole page (before) against lxml on the subtrees the
+scrapers read (after). `--benchmark-group-by=param:page` puts the two side by side.
+"""
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+pytest.importorskip("lxml")
+pytestmark = pytest.mark.benchmark
+
+from scraper_common.html import SoupMaker, parse_only  # noqa: E402
+
+FIXTURES_DIR = Path(__file__).parent.parent / "fixtures"
+
+# saved page: the selectors its scraper parses, None for the pages parsed whole
+PAGES = {
+    "v2ph.com/actor.html": (".row.card-body",),
+    "v2ph.com/search.html": (".container.main-wrap",),
+    "v2ph.com/album.html": None,
+    "xchina.co/model.html": (".content-box.object-card",),
+    "xchina.co/search.html": (".list.model-list",),
+    "galleryepic.com/search.html": (".grid.grid-cols-2",),
+    "galleryepic.com/coser.html": None,
+    "galleryepic.com/album.html": None,
+    "e-hentai.org/gallery.html": ("#gn", "#taglist"),
+    "javdb.com/search.html": (".movie-list",),
+    "javdb.com/actors.html": (".box.actor-box",),
+    "javdb.com/actor.html": (".actor-section-name", ".avatar", ".column.section-addition"),
+    "javdb.com/movie.html": None,
+}
+
+
+@pytest.mark.parametrize("parser", ["html.parser", "lxml"], ids=["before", "after"])
+@pytest.mark.parametrize("page", PAGES)
+def test_make_soup(measure, page, parser):
+    markup = (FIXTURES_DIR / page).read_bytes()
+    strainer = parse_only(*PAGES[page]) if PAGES[page] and parser == "lxml" else None
+    measure(SoupMaker(parser), markup, strainer)
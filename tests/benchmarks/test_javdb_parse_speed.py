@@ -0,0 +1,56 @@
+"""Time and allocations of every JavDBScraper parser, per saved page."""
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+pytestmark = pytest.mark.benchmark
+
+JAVDB_HEADERS = {"accept-language": "zh-CN,zh;q=0.9,en;q=0.8,en-GB;q=0.7,en-US;q=0.6"}
+SEARCH_PAGE = Path(__file__).parent.parent / "fixtures" / "javdb.com" / "search.html"
+
+
+@pytest.fixture(scope="module")
+def scraper(load_scraper):
+    pytest.importorskip("py_common")
+    pytest.importorskip("cloudscraper")
+    scraper, = load_scraper("JavDBScraper", "scraper")
+    return scraper
+
+
+@pytest.fixture(scope="module")
+def javdb(scraper):
+    return scraper.JavDB()
+
+
+def test_parse_jav(javdb, replay, measure):
+    url = "https://javdb.com/v/bbb02"
+    replay(url, "javdb.com/movie.html", headers=JAVDB_HEADERS)
+    replay("https://javdb.com/actors/yui", "javdb.com/actor.html", headers=JAVDB_HEADERS)
+    measure(javdb.parse_jav, url)
+
+
+def test_parse_performer(javdb, replay, measure):
+    url = "https://javdb.com/actors/yui"
+    replay(url, "javdb.com/actor.html", headers=JAVDB_HEADERS)
+    measure(javdb.parse_performer, url)
+
+
+def test_search_scenes(javdb, replay, measure):
+    replay("https://javdb.com/search?q=abc&f=all", "javdb.com/search.html", headers=JAVDB_HEADERS)
+    measure(javdb.search_scenes, "abc")
+
+
+def test_search_scene(javdb, replay, measure):
+    replay("https://javdb.com/search?q=T-28123&f=all", "javdb.com/search.html", headers=JAVDB_HEADERS)
+    measure(javdb.search_scene, "T-28123")
+
+
+def test_search_performers(javdb, replay, measure):
+    replay("https://javdb.com/search?q=結衣&f=actor", "javdb.com/actors.html", headers=JAVDB_HEADERS)
+    measure(javdb.search_performers, "結衣")
+
+
+def test_iter_search_results(scraper, measure):
+    page = SEARCH_PAGE.read_bytes()
+    measure(lambda: list(scraper.iter_search_results(page[i:i + 16 * 1024] for i in range(0, len(page), 16 * 1024))))
@@ -0,0 +1,35 @@
+"""Ranking performer search results: the best `PERFORMER_SEARCH_LIMIT` of many candidates against a full sort."""
+import random
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+pytestmark = pytest.mark.benchmark
+
+SYLLABLES = ["xiao", "mei", "lin", "yu", "na", "li", "ai", "yui", "hana", "sakura", "chen", "wang"]
+HANZI = "小美林雨娜丽爱结衣花樱陈王杨幂刘菲"
+
+
+@pytest.fixture(scope="module")
+def ranking(load_scraper):
+    pytest.importorskip("py_common")
+    ranking, = load_scraper("GalleryScraper", "utils.ranking")
+    return ranking
+
+
+def candidates(count: int) -> list[dict[str, str]]:
+    rng = random.Random(count)
+    names = []
+    for i in range(count):
+        latin = " ".join(rng.choice(SYLLABLES).title() for _ in range(rng.randint(1, 3)))
+        hanzi = "".join(rng.choice(HANZI) for _ in range(rng.randint(1, 4)))
+        names.append({"name": f"{hanzi} ({latin})" if i % 2 else latin, "url": f"https://example.com/{i}"})
+    return names
+
+
+@pytest.mark.parametrize("limit", [50, None], ids=["top-50", "full-sort"])
+@pytest.mark.parametrize("count", [1_000, 10_000])
+def test_rank_names(ranking, measure, count, limit):
+    items = candidates(count)
+    ranked = measure(ranking.rank_names, "Xiao Mei", items, lambda p: p["name"], limit)
+    assert len(ranked) == (limit or count)
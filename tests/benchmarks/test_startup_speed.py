@@ -0,0 +1,79 @@
+"""
+Wall time of one `main.py` call as Stash runs it, cold (the scraper starts in the process) and warm (forwarded to
+a resident `python main.py serve`). Both answer from the saved pages.
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+pytestmark = pytest.mark.benchmark
+
+SCRAPERS_DIR = Path(__file__).resolve().parent.parent.parent / "scrapers"
+
+# scraper folder: (mode, input, responses to replay as (url, fixture, headers))
+CALLS = {
+    "GalleryScraper": (
+        "performerByURL",
+        {"url": "https://v2ph.com/actor/xiaomei.html"},
+        [("https://v2ph.com/actor/xiaomei.html", "v2ph.com/actor.html", {"accept-language": "zh-CN,zh;q=0.9"})],
+    ),
+    "JavDBScraper": (
+        "performerByURL",
+        {"url": "https://javdb.com/actors/yui"},
+        [(
+            "https://javdb.com/actors/yui", "javdb.com/actor.html",
+            {"accept-language": "zh-CN,zh;q=0.9,en;q=0.8,en-GB;q=0.7,en-US;q=0.6"}
+        )],
+    ),
+}
+
+
+@pytest.fixture
+def environment(tmp_path):
+    """The scraper processes get their own home, so their cache and daemon socket are not the user's."""
+    pytest.importorskip("py_common")
+    env = dict(os.environ, HOME=str(tmp_path))
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(SCRAPERS_DIR), env.get("PYTHONPATH")]))
+    return env
+
+
+def run_main(folder: str, env: dict, mode: str, info: dict) -> dict:
+    proc = subprocess.run(
+        [sys.executable, "main.py", mode], input=json.dumps(info), cwd=SCRAPERS_DIR / folder, env=env,
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(proc.stdout)
+
+
+@pytest.mark.parametrize("startup", ["cold", "warm"])
+@pytest.mark.parametrize("folder", CALLS)
+def test_main(benchmark, replay, environment, folder, startup):
+    mode, info, responses = CALLS[folder]
+    for url, fixture, headers in responses:
+        replay(url, fixture, headers=headers)
+    expected = run_main(folder, environment, mode, info)
+
+    daemon = None
+    if startup == "warm":
+        daemon = subprocess.Popen(
+            [sys.executable, "main.py", "serve"], cwd=SCRAPERS_DIR / folder, env=environment,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        sockets = Path(environment["HOME"]) / ".cache" / "stash-scrapers"
+        deadline = time.monotonic() + 30
+        while not any(sockets.glob("*.sock")) and daemon.poll() is None and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert any(sockets.glob("*.sock")), "the resident process did not start"
+    try:
+        result = benchmark.pedantic(run_main, (folder, environment, mode, info), rounds=10, warmup_rounds=1)
+    finally:
+        if daemon:
+            daemon.terminate()
+            daemon.wait()
+    assert result == expected
@@ -0,0 +1,32 @@
+"""
+Requests through `HTTP2Adapter` against the default urllib3 adapter, on a local stand-in server over plain HTTP and
+TLS. The stand-in speaks HTTP/1.1, so this measures the overhead of the adapter and its connection reuse rather than
+HTTP/2 multiplexing.
+"""
+import pytest
+import requests
+from requests.adapters import HTTPAdapter
+
+pytest.importorskip("pytest_benchmark")
+pytestmark = pytest.mark.benchmark
+
+from test_gallery_transport import Handler, certificate, server_context, transport  # noqa: E402, F401
+
+REQUESTS = 20
+
+
+@pytest.mark.parametrize("adapter", ["urllib3", "httpx"])
+@pytest.mark.parametrize("scheme", ["http", "https"])
+def test_sequential_requests(transport, http_server, benchmark, certificate, scheme, adapter):  # noqa: F811
+    url = http_server(Handler, server_context(certificate) if scheme == "https" else None)
+    session = requests.Session()
+    session.trust_env = False
+    session.verify = certificate[0]
+    session.mount(url, transport.HTTP2Adapter(max_connections=2) if adapter == "httpx" else HTTPAdapter(pool_maxsize=2))
+
+    def fetch_all():
+        for _ in range(REQUESTS):
+            session.get(url + "echo").raise_for_status()
+
+    benchmark(fetch_all)
+    session.close()
@@ -0,0 +1,110 @@
+"""Time and allocations of the WdTagger stages that run outside the model."""
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+np = pytest.importorskip("numpy")
+pytestmark = pytest.mark.benchmark
+
+from test_wdtagger import canvas_preprocess, loop_postprocess, photo, tags  # noqa: E402
+
+TAG_COUNT = 10_000
+BATCH_SIZE = 8
+WDTAGGER_DIR = Path(__file__).resolve().parent.parent.parent / "scrapers" / "WdTagger"
+
+# a fresh interpreter importing `model` and loading the tags of TAG_FILE, printing the seconds each took
+STARTUP = """
+import json, sys, time
+start = time.perf_counter()
+import config
+config.TAG = sys.argv[1]
+import model
+imported = time.perf_counter()
+model.load_tags()
+print(json.dumps({"import_s": imported - start, "load_tags_s": time.perf_counter() - imported}))
+"""
+
+
+@pytest.fixture(scope="module")
+def sources_4k():
+    return {image_format: photo(3840, 2160, image_format) for image_format in ("JPEG", "PNG")}
+
+
+@pytest.fixture(scope="module")
+def model(load_scraper):
+    pytest.importorskip("py_common")
+    for name in ("onnxruntime", "PIL", "huggingface_hub"):
+        pytest.importorskip(name)
+    model, = load_scraper("WdTagger", "model")
+    return model
+
+
+@pytest.mark.parametrize("implementation", ["loop", "vectorized"])
+@pytest.mark.parametrize("images", [1, 8, 64])
+def test_postprocess(model, measure, images, implementation):
+    t = tags(model, TAG_COUNT)
+    preds = np.random.default_rng(images).random((images, TAG_COUNT), dtype=np.float32)
+    if implementation == "loop":
+        measure(loop_postprocess, t.names, t.general, preds, model.PREDICT_THRESHOLD)
+    else:
+        measure(model.postprocess, t, preds)
+
+
+def canvas_batch(images: list[bytes]) -> np.ndarray:
+    return np.stack([canvas_preprocess(image) for image in images])
+
+
+@pytest.mark.parametrize("implementation", ["canvas", "reduced"])
+@pytest.mark.parametrize("image_format", ["JPEG", "PNG"])
+def test_preprocess_4k_image(model, measure, sources_4k, image_format, implementation):
+    """Time per 3840x2160 source image."""
+    measure(canvas_preprocess if implementation == "canvas" else model.preprocess, sources_4k[image_format])
+
+
+@pytest.mark.parametrize("implementation", ["canvas", "reduced"])
+def test_preprocess_4k_batch(model, measure, benchmark, peak_rss_kib, sources_4k, implementation):
+    """A batch of 4K JPEGs, with the peak RSS of preprocessing it in `extra_info`."""
+    preprocess = canvas_batch if implementation == "canvas" else model.preprocess
+    images = [sources_4k["JPEG"]] * BATCH_SIZE
+    benchmark.extra_info["peak_rss_kib"] = peak_rss_kib(preprocess, images)
+    measure(preprocess, images)
+
+
+@pytest.fixture
+def tag_file(tmp_path):
+    tag_file = tmp_path / "selected_tags.csv"
+    rows = [f"{i},tag_{i},{0 if i % 5 else 4},{TAG_COUNT - i}" for i in range(TAG_COUNT)]
+    tag_file.write_text("tag_id,name,category,count\n" + "\n".join(rows) + "\n", encoding="utf-8")
+    return tag_file
+
+
+@pytest.mark.parametrize("source", ["csv", "npy"])
+def test_startup(model, benchmark, tag_file, source):
+    """
+    Wall time of a fresh interpreter importing `model` and loading the tag vocabulary, parsing the CSV or
+    memory-mapping the arrays saved by an earlier run. The in-process split of one run is in `extra_info`.
+    """
+    def clear_arrays():
+        if source == "csv":
+            for array_file in tag_file.parent.glob("*.npy"):
+                array_file.unlink()
+        return (), {}
+
+    def start() -> dict:
+        proc = subprocess.run(
+            [sys.executable, "-c", STARTUP, str(tag_file)], cwd=WDTAGGER_DIR, env=env,
+            capture_output=True, text=True, check=True
+        )
+        return json.loads(proc.stdout)
+
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(WDTAGGER_DIR), env.get("PYTHONPATH")]))
+    start()  # saves the arrays
+    clear_arrays()
+    benchmark.extra_info.update(start())
+    benchmark.pedantic(start, setup=clear_arrays, rounds=5)
@@ -0,0 +1,114 @@
+"""
+Every scraper folder is a standalone package with top-level modules of the same names (`config`, `handlers`, ...),
+so the tests import one folder at a time through the `load_scraper` fixture.
+Requests are answered from the pages in `fixtures`, registered per test with the `replay` fixture.
+"""
+import importlib
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from types import ModuleType
+from typing import Optional
+
+import pytest
+import requests
+from requests.structures import CaseInsensitiveDict
+
+SCRAPERS_DIR = Path(__file__).resolve().parent.parent / "scrapers"
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+# read by the scraper configs when they are imported: never touch the live sites
+REPLAY_DIR = Path(tempfile.mkdtemp(prefix="scraper-replay-"))
+os.environ["SCRAPER_REPLAY_MODE"] = "replay"
+os.environ["SCRAPER_FIXTURE_DIR"] = str(REPLAY_DIR)
+
+sys.path.insert(0, str(SCRAPERS_DIR))  # scraper_common, like the installed dependency package
+
+from scraper_common.cache import cache_key  # noqa: E402
+from scraper_common.fixtures import FixtureStore  # noqa: E402
+
+
+def _scraper_folder(module: ModuleType) -> Optional[str]:
+    """The scraper folder a module was imported from, None for modules from anywhere else."""
+    try:
+        return Path(module.__file__).resolve().relative_to(SCRAPERS_DIR).parts[0]
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def _load_scraper(folder: str, *modules: str) -> list[ModuleType]:
+    """Freshly import `modules` from a scraper folder, dropping the modules previously imported from any folder."""
+    for name, module in list(sys.modules.items()):
+        if _scraper_folder(module) not in (None, "scraper_common"):
+            del sys.modules[name]
+    sys.path[:] = [p for p in sys.path if Path(p).resolve().parent != SCRAPERS_DIR]
+    sys.path.insert(0, str(SCRAPERS_DIR / folder))
+    return [importlib.import_module(module) for module in modules]
+
+
+@pytest.fixture(scope="session")
+def load_scraper():
+    """`load_scraper("GalleryScraper", "handlers")` imports `handlers` of GalleryScraper, see `_load_scraper`."""
+    return _load_scraper
+
+
+@pytest.fixture
+def replay():
+    """
+    Register a fixture file as the recorded response of a request:
+    `replay(url, "v2ph.com/actor.html", headers={...})`, with the same method, headers and body the scraper sends.
+    """
+    store = FixtureStore(REPLAY_DIR)
+
+    def register(
+            url: str,
+            fixture: str,
+            method: str = "get",
+            headers: Optional[dict] = None,
+            body: str = "",
+            status: int = 200
+    ):
+        resp = requests.Response()
+        resp.url = url
+        resp.status_code = status
+        content_type = "application/json" if fixture.endswith(".json") else "text/html; charset=utf-8"
+        resp.headers = CaseInsensitiveDict({"Content-Type": content_type})
+        resp._content = (FIXTURES_DIR / fixture).read_bytes()
+        store.save(url, cache_key(method, url, headers, body), resp)
+
+    return register
+
+
+@pytest.fixture
+def http_server():
+    """
+    `http_server(handler_class)` serves `handler_class` on a free local port and returns its base URL, over TLS with
+    `http_server(handler_class, context)` and an `ssl.SSLContext`. The servers are stopped after the test.
+    """
+    servers = []
+
+    def start(handler_class: type[BaseHTTPRequestHandler], context=None) -> str:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler_class)
+        server.daemon_threads = True
+        if context:
+            server.socket = context.wrap_socket(server.socket, server_side=True)
+        threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+        servers.append(server)
+        return f"{'https' if context else 'http'}://127.0.0.1:{server.server_port}/"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: timing and allocation benchmarks in `benchmarks`")
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(REPLAY_DIR, ignore_errors=True)
@@ -0,0 +1,306 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+GALLERY_HEADERS = {"accept-language": "zh-CN,zh;q=0.9"}
+
+
+@pytest.fixture(scope="module")
+def handlers(load_scraper):
+    pytest.importorskip("py_common")
+    handlers, = load_scraper("GalleryScraper", "handlers")
+    return handlers
+
+
+def test_v2ph_performer(handlers, replay):
+    url = "https://v2ph.com/actor/xiaomei.html"
+    replay(url, "v2ph.com/actor.html", headers=GALLERY_HEADERS)
+
+    performer = handlers.performer_by_url({"url": url})
+
+    assert performer["name"] == "小美"
+    assert performer["aliases"] == "Xiao Mei, Mei"
+    assert performer["image"] == "https://cdn.v2ph.com/actor/xiaomei.jpg"
+    assert performer["birthdate"] == "1995-03-02"
+    assert performer["height"] == "168"
+    assert performer["measurements"] == "B84W60H88"
+    assert performer["urls"] == [url, "https://weibo.com/xiaomei"]
+    assert performer["details"] == "Model from Shanghai."
+
+
+def test_v2ph_gallery(handlers, replay):
+    url = "https://v2ph.com/album/vol-123.html"
+    replay(url, "v2ph.com/album.html", headers=GALLERY_HEADERS)
+    replay("https://v2ph.com/actor/xiaomei.html", "v2ph.com/actor.html", headers=GALLERY_HEADERS)
+
+    gallery = handlers.gallery_by_url({"url": url})
+
+    assert gallery["title"] == "海边假日 Vol.123"
+    assert gallery["studio"] == {"name": "秀人网", "url": "https://v2ph.com/company/xiuren.html"}
+    assert [p["name"] for p in gallery["performers"]] == ["小美"]
+    assert gallery["code"] == "Vol.123"
+    assert gallery["tags"] == [{"name": "海边"}, {"name": "泳装"}]
+
+
+def test_v2ph_redesigned_page_raises(handlers, replay):
+    url = "https://v2ph.com/actor/redesigned.html"
+    replay(url, "v2ph.com/redesigned.html", headers=GALLERY_HEADERS)
+
+    from scrapers import ParseError
+    with pytest.raises(ParseError):
+        handlers.performer_by_url({"url": url})
+
+
+def test_v2ph_search_deduplicates(handlers, replay):
+    replay("https://www.v2ph.com/search/?q=小美", "v2ph.com/search.html", headers=GALLERY_HEADERS)
+    from scrapers import V2PH
+
+    results = handlers.get_scraper(V2PH).parse_performer_by_name({"name": "小美"})
+
+    assert results == [
+        {"url": "https://v2ph.com/actor/xiaomei.html", "name": "小美"},
+        {"url": "https://v2ph.com/actor/xiaomeimei.html", "name": "小美美"},
+    ]
+
+
+def test_xchina_performer(handlers, replay):
+    url = "https://xchina.co/model/id-1.html"
+    replay(url, "xchina.co/model.html", headers=GALLERY_HEADERS)
+
+    performer = handlers.performer_by_url({"url": url})
+
+    assert performer["name"] == "小美"
+    assert performer["aliases"] == "Xiao Mei, Mei"
+    assert performer["country"] == "CN"
+    assert performer["birthdate"] == "1995-03-02"
+    assert performer["tags"] == [{"name": "华人"}, {"name": "模特"}]
+    assert performer["urls"] == [url, "https://weibo.com/xiaomei"]
+
+
+def test_xchina_search_deduplicates(handlers, replay):
+    replay("https://xchina.co/models/keyword-小美.html", "xchina.co/search.html", headers=GALLERY_HEADERS)
+    from scrapers import XChina
+
+    results = handlers.get_scraper(XChina).parse_performer_by_name({"name": "小美"})
+
+    assert results == [
+        {"url": "https://xchina.co/model/id-1.html", "name": "小美"},
+        {"url": "https://xchina.co/model/id-2.html", "name": "小美美"},
+    ]
+
+
+def test_galleryepic_performer(handlers, replay):
+    url = "https://galleryepic.com/zh/coser/101"
+    replay(url, "galleryepic.com/coser.html")
+
+    performer = handlers.performer_by_url({"url": url})
+
+    assert performer == {
+        "name": "小美",
+        "image": "https://cdn.galleryepic.com/coser/101.jpg",
+        "urls": [url, "https://weibo.com/xiaomei", "https://twitter.com/xiaomei"],
+    }
+
+
+def test_galleryepic_search_deduplicates(handlers, replay):
+    replay("https://galleryepic.com/zh/cosers/1?coserName=小美", "galleryepic.com/search.html")
+    from scrapers import GalleryEpic
+
+    results = handlers.get_scraper(GalleryEpic).parse_performer_by_name({"name": "小美"})
+
+    assert results == [
+        {"url": "https://galleryepic.com/zh/coser/101", "name": "小美"},
+        {"url": "https://galleryepic.com/zh/coser/102", "name": "小美美"},
+    ]
+
+
+def test_galleryepic_album(handlers, replay):
+    url = "https://galleryepic.com/zh/album/555"
+    replay(url, "galleryepic.com/album.html")
+    replay("https://galleryepic.com/zh/model/101", "galleryepic.com/coser.html")
+
+    gallery = handlers.gallery_by_url({"url": url})
+
+    assert gallery["title"] == "海边假日"
+    assert gallery["urls"] == [url]
+    # album pages link the coser URL of the performer, the model URL is the one that works
+    assert [p["urls"][0] for p in gallery["performers"]] == ["https://galleryepic.com/zh/model/101"]
+
+
+def test_misskon_bulk(handlers, replay):
+    replay(
+        "https://misskon.com/wp-json/wp/v2/posts?include=101,102,999&per_page=100&_fields=id,title,content,tags",
+        "misskon.com/posts.json"
+    )
+    replay(
+        "https://misskon.com/wp-json/wp/v2/tags?include=7,8,9&per_page=100&_fields=id,name,link",
+        "misskon.com/tags.json"
+    )
+    from scrapers import MissKon
+    urls = [
+        "https://misskon.com/101-xiuren-vol-1/",
+        "https://misskon.com/tag/xiao-mei/",  # not a post
+        "https://misskon.com/102-xiuren-vol-2/",
+        "https://misskon.com/999-deleted/",
+    ]
+
+    galleries = handlers.get_scraper(MissKon).parse_galleries_by_url([{"url": url} for url in urls])
+
+    assert galleries[1] is None and galleries[3] is None
+    assert galleries[0]["title"] == "[XIUREN] Vol.1 Xiao Mei"
+    assert galleries[0]["urls"] == [
+        urls[0], "https://misskon.com/wp-json/wp/v2/posts/101", "https://example.com/download/101"
+    ]
+    assert [p["name"] for p in galleries[0]["performers"]] == ["Xiao Mei", "Mei"]
+    assert [p["name"] for p in galleries[2]["performers"]] == ["Lin"]
+
+
+def test_ehentai_bulk(handlers, replay):
+    replay(
+        "https://api.e-hentai.org/api.php", "e-hentai.org/gdata.json", method="post",
+        body='{"gidlist": [[618395, "0439fa3666"], [1, "badtoken"]], "method": "gdata", "namespace": 1}'
+    )
+    replay("https://e-hentai.org/g/1/badtoken/", "e-hentai.org/gallery.html", headers=GALLERY_HEADERS)
+    replay(
+        "https://e-hentai.org/gallerytorrents.php?gid=1&t=badtoken", "e-hentai.org/torrents.html",
+        headers=GALLERY_HEADERS
+    )
+    from scrapers import EHentai
+    urls = [
+        "https://e-hentai.org/g/618395/0439fa3666/",
+        "https://e-hentai.org/tag/female:glasses",  # not a gallery
+        "https://e-hentai.org/g/1/badtoken/",
+    ]
+
+    galleries = handlers.get_scraper(EHentai).parse_galleries_by_url([{"url": url} for url in urls])
+
+    assert galleries[0]["title"] == "Alice & Bob Cosplay"
+    assert galleries[0]["tags"] == [{"name": "glasses"}, {"name": "original"}]
+    assert [p["name"] for p in galleries[0]["performers"]] == ["alice", "bob smith"]
+    assert galleries[0]["urls"] == [urls[0]]
+    assert galleries[1] is None
+    # no metadata from the API, scraped from the gallery page
+    assert galleries[2]["title"] == "Fallback Gallery"
+    assert galleries[2]["urls"] == [urls[2], "https://ehtracker.org/get/1/fallback.torrent"]
+
+
+def test_galleries_by_url_keeps_order_and_isolates_failures(handlers, replay):
+    replay(
+        "https://misskon.com/wp-json/wp/v2/posts?include=102&per_page=100&_fields=id,title,content,tags",
+        "misskon.com/posts.json"
+    )
+    replay(
+        "https://misskon.com/wp-json/wp/v2/tags?include=9&per_page=100&_fields=id,name,link",
+        "misskon.com/tags.json"
+    )
+    urls = [
+        "https://v2ph.com/album/not-recorded.html",
+        "https://unknown.example/gallery/1",
+        "https://misskon.com/102-xiuren-vol-2/",
+    ]
+
+    galleries = handlers.galleries_by_url({"urls": urls})
+
+    assert galleries[0] is None and galleries[1] is None
+    assert galleries[2]["title"] == "[XIUREN] Vol.2 Lin"
+
+
+def stub_scraper(search, name: str = "Stub"):
+    """A scraper class of a fake site whose performer search is `search(scraper, info)`."""
+    from scrapers import BaseGalleryScraper
+
+    class Stub(BaseGalleryScraper):
+        domain = [f"{name.lower()}.invalid"]
+
+        def __init__(self):
+            super().__init__(f"https://{self.domain[0]}")
+
+        def parse_performer_by_name(self, info):
+            return search(self, info)
+
+        def parse_performer_by_url(self, info):
+            raise NotImplementedError
+
+        def parse_gallery_by_url(self, info):
+            raise NotImplementedError
+
+    Stub.__name__ = name
+    return Stub
+
+
+def sleeping_search(delay: float):
+    def search(scraper, info):
+        time.sleep(delay)
+        return [{"name": f"{info['name']} {delay}", "url": f"https://{scraper.domain[0]}/{delay}"}]
+
+    return search
+
+
+def test_performer_by_name_takes_as_long_as_the_slowest_site(handlers, monkeypatch):
+    delays = [0.1, 0.2, 0.4, 0.3]
+    monkeypatch.setattr(handlers, "all_scrapers", [
+        stub_scraper(sleeping_search(delay), f"Site{i}") for i, delay in enumerate(delays)
+    ])
+
+    start = time.perf_counter()
+    results = handlers.MODES["performerByName"]({"name": "Mei"})
+    elapsed = time.perf_counter() - start
+
+    assert len(results) == len(delays)
+    assert max(delays) <= elapsed < max(delays) + 0.15  # not their sum
+
+
+def test_performer_by_name_drops_sites_past_the_timeout(handlers, monkeypatch):
+    monkeypatch.setattr(handlers, "PERFORMER_SEARCH_TIMEOUT", 0.2)
+    monkeypatch.setattr(handlers, "all_scrapers", [
+        stub_scraper(sleeping_search(0.05), "Fast"), stub_scraper(sleeping_search(1.0), "Slow")
+    ])
+
+    start = time.perf_counter()
+    results = handlers.MODES["performerByName"]({"name": "Mei"})
+
+    assert time.perf_counter() - start < 0.5
+    assert [r["url"] for r in results] == ["https://fast.invalid/0.05"]
+
+
+class SlowHandler(BaseHTTPRequestHandler):
+    """Answers every request after 3 seconds."""
+
+    def do_GET(self):
+        time.sleep(3)
+        try:
+            self.send_response(200)
+            self.end_headers()
+        except OSError:  # the client gave up
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+def test_performer_search_timeout_ends_its_requests(handlers, monkeypatch, tmp_path, http_server):
+    """The search thread gives up with the timeout, instead of keeping the process alive until the site answers."""
+    import scrapers.base as base
+    from scraper_common.proxies import ProxyRouter
+    from scraper_common.ratelimit import RateLimiter
+    monkeypatch.setattr(base, "REPLAY_MODE", "")
+    monkeypatch.setattr(base, "rate_limiter", lambda: RateLimiter({"default": (100.0, 10)}, tmp_path))
+    monkeypatch.setattr(base, "proxy_router", lambda: ProxyRouter({"default": None}))
+    monkeypatch.setattr(handlers, "PERFORMER_SEARCH_TIMEOUT", 0.5)
+    slow_server = http_server(SlowHandler)
+    done = threading.Event()
+
+    def search(scraper, info):
+        try:
+            return scraper.fetch("get", slow_server, cache=False)
+        finally:
+            done.set()
+
+    monkeypatch.setattr(handlers, "all_scrapers", [stub_scraper(search)])
+
+    start = time.perf_counter()
+    assert handlers.MODES["performerByName"]({"name": "Mei"}) == []
+    assert done.wait(1.0)
+    assert time.perf_counter() - start < 1.0
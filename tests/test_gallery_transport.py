@@ -0,0 +1,148 @@
+"""`HTTP2Adapter` against a local server, as mounted by `configure_session`."""
+import shutil
+import ssl
+import subprocess
+import time
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+import requests
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.path == "/cookie":
+            self.reply(200, b"set", [("Set-Cookie", "session=abc; Path=/"), ("Set-Cookie", "theme=dark; Path=/")])
+        elif self.path == "/redirect":
+            self.reply(302, b"", [("Location", "/echo")])
+        elif self.path == "/slow":
+            time.sleep(1)
+            self.reply(200, b"late")
+        else:
+            cookies = (self.headers.get("Cookie") or "").encode()
+            self.reply(200, cookies, [("Content-Type", "text/plain; charset=utf-8")])
+
+    def reply(self, status: int, body: bytes, headers: list[tuple[str, str]] = ()):
+        try:
+            self.send_response(status)
+            for name, value in headers:
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except OSError:  # the client gave up
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def transport(load_scraper):
+    pytest.importorskip("py_common")
+    pytest.importorskip("httpx")
+    pytest.importorskip("h2")
+    transport, = load_scraper("GalleryScraper", "utils.transport")
+    return transport
+
+
+def session(transport, base_url: str) -> requests.Session:
+    session = requests.Session()
+    session.trust_env = False
+    session.mount(base_url, transport.HTTP2Adapter(max_connections=2))
+    return session
+
+
+@pytest.fixture(scope="module")
+def certificate(tmp_path_factory):
+    """A self-signed certificate and key for 127.0.0.1, used by the server and as client certificate."""
+    if not shutil.which("openssl"):
+        pytest.skip("needs openssl")
+    directory = tmp_path_factory.mktemp("tls")
+    cert, key = directory / "cert.pem", directory / "key.pem"
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1", "-subj", "/CN=127.0.0.1",
+            "-addext", "subjectAltName=IP:127.0.0.1", "-keyout", str(key), "-out", str(cert),
+        ],
+        check=True, capture_output=True
+    )
+    return str(cert), str(key)
+
+
+def server_context(certificate, client_cert: bool = False) -> ssl.SSLContext:
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(*certificate)
+    if client_cert:
+        context.verify_mode = ssl.CERT_REQUIRED
+        context.load_verify_locations(certificate[0])
+    return context
+
+
+def test_response(transport, http_server):
+    url = http_server(Handler)
+    resp = session(transport, url).get(url + "echo")
+    assert (resp.status_code, resp.text, resp.url) == (200, "", url + "echo")
+    assert resp.headers["content-type"] == "text/plain; charset=utf-8" and resp.encoding == "utf-8"
+
+
+def test_cookies_are_stored_and_sent(transport, http_server):
+    url = http_server(Handler)
+    s = session(transport, url)
+
+    s.get(url + "cookie")
+
+    assert s.cookies.get_dict() == {"session": "abc", "theme": "dark"}
+    assert sorted(s.get(url + "echo").text.split("; ")) == ["session=abc", "theme=dark"]
+
+
+def test_redirects_are_followed_by_requests(transport, http_server):
+    url = http_server(Handler)
+    resp = session(transport, url).get(url + "redirect")
+    assert resp.url == url + "echo"
+    assert [r.status_code for r in resp.history] == [302]
+    assert not session(transport, url).get(url + "redirect", allow_redirects=False).text
+
+
+@pytest.mark.parametrize("timeout", [0.2, (1, 0.2)])
+def test_timeouts_raise_requests_timeout(transport, http_server, timeout):
+    url = http_server(Handler)
+    with pytest.raises(requests.Timeout):
+        session(transport, url).get(url + "slow", timeout=timeout)
+
+
+def test_connection_errors_raise_requests_connection_error(transport):
+    url = "http://127.0.0.1:9/"  # discard, nothing listens there
+    with pytest.raises(requests.ConnectionError):
+        session(transport, url).get(url, timeout=1)
+
+
+def test_verify_with_ca_bundle(transport, http_server, certificate):
+    url = http_server(Handler, server_context(certificate))
+    s = session(transport, url)
+
+    with pytest.raises(requests.ConnectionError):  # not signed by a CA of the default bundle
+        s.get(url + "echo")
+    assert s.get(url + "echo", verify=certificate[0]).status_code == 200
+    assert s.get(url + "echo", verify=False).status_code == 200
+
+
+def test_client_certificate(transport, http_server, certificate):
+    url = http_server(Handler, server_context(certificate, client_cert=True))
+    s = session(transport, url)
+
+    assert s.get(url + "echo", verify=certificate[0], cert=certificate).status_code == 200
+    with pytest.raises(requests.ConnectionError):
+        s.get(url + "echo", verify=certificate[0])
+
+
+def test_one_client_per_tls_setting(transport):
+    adapter = transport.HTTP2Adapter(max_connections=2)
+    try:
+        assert adapter._client(None, True, None) is adapter._client(None, True, None)
+        assert adapter._client(None, True, None) is not adapter._client(None, False, None)
+        assert adapter._client(None, True, None) is not adapter._client("http://127.0.0.1:3128", True, None)
+    finally:
+        adapter.close()
@@ -0,0 +1,153 @@
+"""
+The scrapers parse pages with lxml and only the subtrees they read. Scraping the saved pages with the full tree
+built by html.parser must give the same results.
+"""
+import sys
+
+import pytest
+
+GALLERY_HEADERS = {"accept-language": "zh-CN,zh;q=0.9"}
+JAVDB_HEADERS = {"accept-language": "zh-CN,zh;q=0.9,en;q=0.8,en-GB;q=0.7,en-US;q=0.6"}
+
+# name: (responses to replay as (url, fixture, headers), scrape taking the handlers and the scrapers package)
+GALLERY_CASES = {
+    "v2ph performer": (
+        [("https://v2ph.com/actor/xiaomei.html", "v2ph.com/actor.html", GALLERY_HEADERS)],
+        lambda handlers, scrapers: handlers.performer_by_url({"url": "https://v2ph.com/actor/xiaomei.html"}),
+    ),
+    "v2ph gallery": (
+        [
+            ("https://v2ph.com/album/vol-123.html", "v2ph.com/album.html", GALLERY_HEADERS),
+            ("https://v2ph.com/actor/xiaomei.html", "v2ph.com/actor.html", GALLERY_HEADERS),
+        ],
+        lambda handlers, scrapers: handlers.gallery_by_url({"url": "https://v2ph.com/album/vol-123.html"}),
+    ),
+    "v2ph search": (
+        [("https://www.v2ph.com/search/?q=小美", "v2ph.com/search.html", GALLERY_HEADERS)],
+        lambda handlers, scrapers: handlers.get_scraper(scrapers.V2PH).parse_performer_by_name({"name": "小美"}),
+    ),
+    "xchina performer": (
+        [("https://xchina.co/model/id-1.html", "xchina.co/model.html", GALLERY_HEADERS)],
+        lambda handlers, scrapers: handlers.performer_by_url({"url": "https://xchina.co/model/id-1.html"}),
+    ),
+    "xchina search": (
+        [("https://xchina.co/models/keyword-小美.html", "xchina.co/search.html", GALLERY_HEADERS)],
+        lambda handlers, scrapers: handlers.get_scraper(scrapers.XChina).parse_performer_by_name({"name": "小美"}),
+    ),
+    "galleryepic performer": (
+        [("https://galleryepic.com/zh/coser/101", "galleryepic.com/coser.html", None)],
+        lambda handlers, scrapers: handlers.performer_by_url({"url": "https://galleryepic.com/zh/coser/101"}),
+    ),
+    "galleryepic album": (
+        [
+            ("https://galleryepic.com/zh/album/555", "galleryepic.com/album.html", None),
+            ("https://galleryepic.com/zh/model/101", "galleryepic.com/coser.html", None),
+        ],
+        lambda handlers, scrapers: handlers.gallery_by_url({"url": "https://galleryepic.com/zh/album/555"}),
+    ),
+    "galleryepic search": (
+        [("https://galleryepic.com/zh/cosers/1?coserName=小美", "galleryepic.com/search.html", None)],
+        lambda handlers, scrapers: handlers.get_scraper(scrapers.GalleryEpic).parse_performer_by_name(
+            {"name": "小美"}
+        ),
+    ),
+    "misskon posts": (
+        [
+            (
+                "https://misskon.com/wp-json/wp/v2/posts?include=101,102&per_page=100&_fields=id,title,content,tags",
+                "misskon.com/posts.json", None
+            ),
+            (
+                "https://misskon.com/wp-json/wp/v2/tags?include=7,8,9&per_page=100&_fields=id,name,link",
+                "misskon.com/tags.json", None
+            ),
+        ],
+        lambda handlers, scrapers: handlers.get_scraper(scrapers.MissKon).parse_galleries_by_url([
+            {"url": "https://misskon.com/101-xiuren-vol-1/"}, {"url": "https://misskon.com/102-xiuren-vol-2/"}
+        ]),
+    ),
+    "ehentai gallery page": (
+        [
+            ("https://e-hentai.org/g/1/badtoken/", "e-hentai.org/gallery.html", GALLERY_HEADERS),
+            (
+                "https://e-hentai.org/gallerytorrents.php?gid=1&t=badtoken", "e-hentai.org/torrents.html",
+                GALLERY_HEADERS
+            ),
+        ],
+        lambda handlers, scrapers: handlers.get_scraper(scrapers.EHentai).parse_gallery_page(
+            {"url": "https://e-hentai.org/g/1/badtoken/"}
+        ),
+    ),
+}
+
+JAVDB_CASES = {
+    "movie": (
+        [
+            ("https://javdb.com/v/bbb02", "javdb.com/movie.html"),
+            ("https://javdb.com/actors/yui", "javdb.com/actor.html"),
+        ],
+        lambda javdb: javdb.parse_jav("https://javdb.com/v/bbb02"),
+    ),
+    "actress": (
+        [("https://javdb.com/actors/yui", "javdb.com/actor.html")],
+        lambda javdb: javdb.parse_performer("https://javdb.com/actors/yui"),
+    ),
+    "scene search": (
+        [("https://javdb.com/search?q=abc&f=all", "javdb.com/search.html")],
+        lambda javdb: javdb.search_scenes("abc"),
+    ),
+    "actress search": (
+        [("https://javdb.com/search?q=結衣&f=actor", "javdb.com/actors.html")],
+        lambda javdb: javdb.search_performers("結衣"),
+    ),
+}
+
+
+def full_html_parser_soup(markup, strainer=None):
+    """The tree the scrapers built before lxml and strainers: html.parser and the whole page."""
+    from scraper_common.html import SoupMaker
+    return SoupMaker("html.parser")(markup)
+
+
+@pytest.fixture(scope="module")
+def gallery(load_scraper):
+    pytest.importorskip("py_common")
+    pytest.importorskip("lxml")
+    return load_scraper("GalleryScraper", "handlers", "scrapers", "utils")
+
+
+@pytest.fixture(scope="module")
+def javdb(load_scraper):
+    pytest.importorskip("py_common")
+    pytest.importorskip("cloudscraper")
+    pytest.importorskip("lxml")
+    scraper, = load_scraper("JavDBScraper", "scraper")
+    return scraper
+
+
+@pytest.mark.parametrize("case", GALLERY_CASES)
+def test_gallery_scrapes_match_full_html_parser(gallery, replay, monkeypatch, case):
+    handlers, scrapers, utils = gallery
+    responses, scrape = GALLERY_CASES[case]
+    for url, fixture, headers in responses:
+        replay(url, fixture, headers=headers)
+    assert utils.make_soup.parser == "lxml"
+
+    scraped = scrape(handlers, scrapers)
+    for site in ("V2PH", "XChina", "GalleryEpic", "MissKon", "EHentai"):
+        monkeypatch.setattr(sys.modules[f"scrapers.{site}"], "make_soup", full_html_parser_soup)
+
+    assert scrape(handlers, scrapers) == scraped
+
+
+@pytest.mark.parametrize("case", JAVDB_CASES)
+def test_javdb_scrapes_match_full_html_parser(javdb, replay, monkeypatch, case):
+    responses, scrape = JAVDB_CASES[case]
+    for url, fixture in responses:
+        replay(url, fixture, headers=JAVDB_HEADERS)
+    assert javdb.make_soup.parser == "lxml"
+
+    scraped = scrape(javdb.JavDB())
+    monkeypatch.setattr(javdb, "make_soup", full_html_parser_soup)
+
+    assert scrape(javdb.JavDB()) == scraped
@@ -0,0 +1,160 @@
+import time
+from pathlib import Path
+
+import pytest
+
+SEARCH_PAGE = Path(__file__).parent / "fixtures" / "javdb.com" / "search.html"
+JAVDB_HEADERS = {"accept-language": "zh-CN,zh;q=0.9,en;q=0.8,en-GB;q=0.7,en-US;q=0.6"}
+
+
+@pytest.fixture(scope="module")
+def codes(load_scraper):
+    codes, = load_scraper("JavDBScraper", "codes")
+    return codes
+
+
+@pytest.fixture(scope="module")
+def parsing(load_scraper):
+    pytest.importorskip("bs4")
+    parsing, = load_scraper("JavDBScraper", "parsing")
+    return parsing
+
+
+@pytest.fixture(scope="module")
+def scraper(load_scraper):
+    pytest.importorskip("py_common")
+    pytest.importorskip("cloudscraper")
+    scraper, = load_scraper("JavDBScraper", "scraper")
+    return scraper
+
+
+@pytest.fixture(scope="module")
+def javdb(scraper):
+    return scraper.JavDB()
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("abc-012", "ABC-12"),
+    ("ABC12", "ABC-12"),
+    ("abc_0012", "ABC-12"),
+    (" FC2-PPV-1234567 ", "FC-2-PPV-1234567"),
+    ("T28-123", "T-28-123"),
+    ("T-28123", "T-28123"),
+    ("ABC-1-01", "ABC-1-1"),
+    ("ABC-11", "ABC-11"),
+])
+def test_normalize_code(codes, text, expected):
+    assert codes.normalize_code(text) == expected
+
+
+@pytest.mark.parametrize("a, b", [("T28-123", "T-28123"), ("ABC-1-01", "ABC-11"), ("ABC-120", "ABC-12")])
+def test_normalize_code_keeps_codes_apart(codes, a, b):
+    assert codes.normalize_code(a) != codes.normalize_code(b)
+
+
+@pytest.mark.parametrize("text", ["12345", "summer", "title 7", "", "ABC-"])
+def test_normalize_code_rejects_non_codes(codes, text):
+    assert codes.normalize_code(text) is None
+
+
+def test_code_index_expires(codes, tmp_path, monkeypatch):
+    index = codes.CodeIndex(tmp_path / "codes.sqlite", ttl=60)
+    index.put({"ABC-12": "https://javdb.com/v/bbb02"})
+    assert index.get("ABC-12") == "https://javdb.com/v/bbb02"
+
+    now = time.time()
+    monkeypatch.setattr(codes.time, "time", lambda: now + 61)
+    assert index.get("ABC-12") is None
+
+
+def test_code_index_forget(codes, tmp_path):
+    index = codes.CodeIndex(tmp_path / "codes.sqlite", ttl=60)
+    index.put({"ABC-12": "https://javdb.com/v/bbb02", "ABC-120": "https://javdb.com/v/aaa01"})
+
+    index.forget("https://javdb.com/v/bbb02")
+
+    assert index.get("ABC-12") is None
+    assert index.get("ABC-120") == "https://javdb.com/v/aaa01"
+
+
+def test_search_result_parser(parsing):
+    parser = parsing.SearchResultParser()
+    parser.feed(SEARCH_PAGE.read_text(encoding="utf-8"))
+    assert parser.results == [
+        ("ABC-120", "ABC-120 夏の思い出", "/v/aaa01"),
+        ("ABC-012", "ABC-012 春の訪れ 字幕", "/v/bbb02"),
+        ("T-28123", "T-28123 秋の夜", "/v/ccc03"),
+    ]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 1 << 20])
+def test_iter_search_results_chunked(parsing, chunk_size):
+    """Chunks may end inside a tag or inside a multi-byte character."""
+    page = SEARCH_PAGE.read_bytes()
+    chunks = (page[i:i + chunk_size] for i in range(0, len(page), chunk_size))
+    assert [href for _, _, href in parsing.iter_search_results(chunks)] == ["/v/aaa01", "/v/bbb02", "/v/ccc03"]
+
+
+def test_search_scene_by_code(javdb, replay):
+    replay("https://javdb.com/search?q=abc12&f=all", "javdb.com/search.html", headers=JAVDB_HEADERS)
+    assert javdb.search_scene("abc12") == "https://javdb.com/v/bbb02"
+
+
+def test_search_scene_does_not_confuse_codes(javdb, replay):
+    replay("https://javdb.com/search?q=T28-123&f=all", "javdb.com/search.html", headers=JAVDB_HEADERS)
+    assert javdb.search_scene("T28-123") is None
+
+
+def test_search_scene_by_title(javdb, replay):
+    replay("https://javdb.com/search?q=秋の夜&f=all", "javdb.com/search.html", headers=JAVDB_HEADERS)
+    assert javdb.search_scene("秋の夜") == "https://javdb.com/v/ccc03"
+
+
+def test_search_performers(javdb, replay):
+    replay("https://javdb.com/search?q=結衣&f=actor", "javdb.com/actors.html", headers=JAVDB_HEADERS)
+    assert javdb.search_performers("結衣") == [
+        {"name": "結衣", "url": "https://javdb.com/actors/yui"},
+        {"name": "結衣花", "url": "https://javdb.com/actors/yuika"},
+    ]
+
+
+def test_parse_jav(javdb, replay):
+    url = "https://javdb.com/v/bbb02"
+    replay(url, "javdb.com/movie.html", headers=JAVDB_HEADERS)
+    replay("https://javdb.com/actors/yui", "javdb.com/actor.html", headers=JAVDB_HEADERS)
+
+    scene = javdb.parse_jav(url)
+
+    assert scene["title"] == "春の訪れ"
+    assert scene["code"] == "ABC-012"
+    assert scene["date"] == "2021-04-05"
+    assert scene["image"] == "https://c0.jdbstatic.com/covers/bb/bbb02.jpg"
+    assert scene["studio"] == {"name": "ABC Studio"}
+    assert scene["groups"] == [{"name": "季節", "url": "https://javdb.com/series/spring"}]
+    assert scene["tags"] == [{"name": "劇情"}, {"name": "戶外"}]
+    assert scene["urls"] == [url, "magnet:?xt=urn:btih:0123456789abcdef"]
+    # only the actresses, with their own pages parsed
+    assert scene["performers"] == [{
+        "name": "結衣",
+        "aliases": "Yui",
+        "image": "https://c0.jdbstatic.com/avatars/yu/yui.jpg",
+        "urls": ["https://javdb.com/actors/yui", "https://twitter.com/yui"],
+    }]
+
+
+def test_parse_jav_not_found_forgets_the_indexed_page(scraper, javdb, tmp_path, monkeypatch):
+    from scraper_common.retry import FetchError
+    index = scraper.CodeIndex(tmp_path / "codes.sqlite", ttl=60)
+    index.put({"ABC-12": "https://javdb.com/v/bbb02"})
+    monkeypatch.setattr(scraper, "REPLAY_MODE", "")
+    monkeypatch.setattr(scraper, "code_index", lambda: index)
+
+    def fetch_soup(url, cache=True, strainer=None):
+        raise FetchError(url, 404, 1)
+
+    monkeypatch.setattr(javdb, "fetch_soup", fetch_soup)
+    assert javdb.search_scene("abc-012") == "https://javdb.com/v/bbb02"
+    with pytest.raises(FetchError):
+        javdb.parse_jav("https://javdb.com/v/bbb02")
+
+    assert index.get("ABC-12") is None
@@ -0,0 +1,62 @@
+import pytest
+
+# searched name, candidate names as the sites return them, and the one a user would pick
+LABELLED = [
+    ("小美", ["小美美", "大美", "小美", "美"], "小美"),
+    ("美", ["小红", "美美子", "美", "小美"], "美"),
+    ("小美", ["林", "美", "红"], "美"),
+    ("Xiao Mei", ["Mei Xiao", "Xiao Lin", "xiao-mei"], "xiao-mei"),
+    ("xiaomei", ["Xiao Lin", "Mei", "Xiao Mei"], "Xiao Mei"),
+    ("ＡＢＣ", ["abd", "abc", "bcd"], "abc"),
+    ("ユイ", ["ゆか", "ユウ", "ゆい"], "ゆい"),
+    ("Mei (小美)", ["Lin", "大美", "小美"], "小美"),
+    ("Lin", ["Linda", "Lin / 林", "Colin"], "Lin / 林"),
+    ("Alice", ["Malice", "Alicia", "Alice"], "Alice"),
+    ("A", ["B", "Bella", "A"], "A"),
+    ("A", ["Bella", "Anna"], "Anna"),
+]
+
+
+@pytest.fixture(scope="module")
+def ranking(load_scraper):
+    pytest.importorskip("py_common")
+    ranking, = load_scraper("GalleryScraper", "utils.ranking")
+    return ranking
+
+
+def test_labelled_names_rank_first(ranking):
+    misses = [
+        (query, ranking.rank_names(query, candidates, key=str)[0], expected)
+        for query, candidates, expected in LABELLED
+        if ranking.rank_names(query, candidates, key=str)[0] != expected
+    ]
+    assert misses == []
+
+
+@pytest.mark.parametrize("query, candidate", [("美", "小美"), ("小美", "美"), ("A", "Anna")])
+def test_one_character_names_score(ranking, query, candidate):
+    assert ranking.NameQuery(query).score(candidate) > 0
+
+
+@pytest.mark.parametrize("query, candidate", [
+    ("小美", "小美"), ("Xiao Mei", "xiao-mei"), ("ＡＢＣ", "abc"), ("ユイ", "ゆい"), ("美", "美"),
+])
+def test_equal_names_score_one(ranking, query, candidate):
+    assert ranking.NameQuery(query).score(candidate) == 1.0
+
+
+@pytest.mark.parametrize("traditional, simplified", [("楊冪", "杨幂"), ("小龍", "小龙"), ("劉亦菲 (Crystal)", "刘亦菲")])
+def test_traditional_and_simplified_chinese_fold(ranking, traditional, simplified):
+    pytest.importorskip("opencc")
+    assert ranking.NameQuery(traditional).score(simplified) == 1.0
+
+
+def test_unrelated_names_score_zero(ranking):
+    assert ranking.NameQuery("小美").score("Lin") == 0.0
+
+
+def test_rank_names_limit_and_stability(ranking):
+    names = ["Mei", "Lin", "Mei", "Meiko", "Lin"]
+    ranked = ranking.rank_names("Mei", list(enumerate(names)), key=lambda item: item[1])
+    assert [i for i, _ in ranked] == [0, 2, 3, 1, 4]
+    assert ranking.rank_names("Mei", list(enumerate(names)), key=lambda item: item[1], limit=2) == ranked[:2]
@@ -0,0 +1,169 @@
+import io
+import threading
+import time
+from email.utils import formatdate
+from typing import Optional
+
+import pytest
+import requests
+
+from scraper_common.clearance import ClearanceStore
+from scraper_common.performers import canonical_url
+from scraper_common.proxies import ProxyRouter
+from scraper_common.ratelimit import RateLimiter, TokenBucket
+from scraper_common.retry import FetchError, retry_after, retry_delay, send_with_retries
+
+
+def response(**headers: str) -> requests.Response:
+    resp = requests.Response()
+    resp.headers.update(headers)
+    return resp
+
+
+def test_retry_after_seconds():
+    assert retry_after(response(**{"Retry-After": "120"})) == 120.0
+
+
+def test_retry_after_http_date():
+    delay = retry_after(response(**{"Retry-After": formatdate(time.time() + 30, usegmt=True)}))
+    assert 28 <= delay <= 30
+
+
+def test_retry_after_date_in_the_past():
+    assert retry_after(response(**{"Retry-After": formatdate(time.time() - 30, usegmt=True)})) == 0.0
+
+
+@pytest.mark.parametrize("resp", [None, response(), response(**{"Retry-After": "soon"})])
+def test_retry_after_missing_or_invalid(resp):
+    assert retry_after(resp) is None
+
+
+def test_retry_delay_is_capped():
+    assert retry_delay(1, response(**{"Retry-After": "3600"}), backoff=1.0, max_delay=60) == 60
+    assert all(0 <= retry_delay(10, None, backoff=1.0, max_delay=5) <= 5 for _ in range(100))
+
+
+def responses(*outcomes: int | Exception):
+    """A send callable answering with the given status codes or raising the given exceptions, in order."""
+    outcomes = iter(outcomes)
+
+    def send(timeout: Optional[float]) -> requests.Response:
+        outcome = next(outcomes)
+        if isinstance(outcome, Exception):
+            raise outcome
+        resp = response()
+        resp.status_code = outcome
+        resp.raw = io.BytesIO()
+        return resp
+
+    return send
+
+
+def send(
+        outcomes: tuple,
+        max_retries: int = 3,
+        backoff: float = 0.0,
+        deadline: Optional[float] = None
+) -> tuple[requests.Response, int, list[str]]:
+    warnings = []
+    resp, attempts = send_with_retries(
+        "https://example.com/", responses(*outcomes), TokenBucket(1000, 10), threading.Lock(),
+        max_retries, backoff, backoff * 8, warnings.append, deadline=deadline
+    )
+    return resp, attempts, warnings
+
+
+def test_send_with_retries_retries_transient_failures():
+    resp, attempts, warnings = send((503, requests.ConnectionError(), 200))
+    assert (resp.status_code, attempts) == (200, 3)
+    assert [w.split("(")[-1] for w in warnings] == ["HTTP 503)", "no response)"]
+
+
+@pytest.mark.parametrize("status", [200, 404])
+def test_send_with_retries_returns_final_statuses(status):
+    resp, attempts, warnings = send((status,))
+    assert (resp.status_code, attempts, warnings) == (status, 1, [])
+
+
+def test_send_with_retries_gives_up():
+    resp, attempts, _ = send((503, 503, 503), max_retries=2)
+    assert (resp.status_code, attempts) == (503, 3)
+    with pytest.raises(FetchError) as e:
+        send((requests.Timeout(), requests.Timeout()), max_retries=1)
+    assert (e.value.status_code, e.value.attempts) == (None, 2)
+
+
+def test_send_with_retries_stops_at_the_deadline():
+    start = time.monotonic()
+    resp, attempts, warnings = send((503,) * 10, max_retries=9, backoff=0.1, deadline=start + 0.3)
+    assert resp.status_code == 503 and attempts < 10
+    assert time.monotonic() - start < 0.3
+    with pytest.raises(FetchError):
+        send((200,), deadline=start)  # already past, nothing is sent
+
+
+@pytest.mark.parametrize("url", [
+    "https://www.v2ph.com/actor/abc/",
+    "http://v2ph.com/actor/abc",
+    "https://v2ph.com/actor/abc#top",
+    " https://V2PH.com/actor/abc/ ",
+])
+def test_canonical_url(url):
+    assert canonical_url(url) == "v2ph.com/actor/abc"
+
+
+def test_canonical_url_keeps_query():
+    url = "https://misskon.com/wp-json/wp/v2/tags?include=1"
+    assert canonical_url(url) == "misskon.com/wp-json/wp/v2/tags?include=1"
+
+
+def test_proxy_router():
+    router = ProxyRouter({"default": None, "v2ph.com": "http://127.0.0.1:8080"})
+    assert router.for_url("https://www.v2ph.com/album/1.html") == {
+        "http": "http://127.0.0.1:8080", "https": "http://127.0.0.1:8080"
+    }
+    assert router.for_url("https://xchina.co/") == {}
+    assert router.for_url("https://xchina.co/a") is router.for_url("https://xchina.co/b")
+
+
+def test_rate_limiter_per_host(tmp_path):
+    limiter = RateLimiter({"default": (4.0, 8), "v2ph.com": (1.0, 2)}, tmp_path)
+    bucket = limiter.for_url("https://www.v2ph.com/a")
+    assert (bucket.rate, bucket.burst) == (1.0, 2)
+    assert limiter.for_url("https://v2ph.com/b") is bucket
+    assert limiter.for_url("https://xchina.co/").rate == 4.0
+
+
+def issue_clearance(client: requests.Session, value: str):
+    client.cookies.set("cf_clearance", value, domain="javdb.com", path="/", expires=int(time.time()) + 3600)
+
+
+def test_clearance_written_only_when_it_changes(tmp_path):
+    store, client = ClearanceStore(tmp_path, "javdb.com"), requests.Session()
+    store.record(client, None)
+    assert not store.path.exists()
+
+    issue_clearance(client, "first")
+    store.record(client, None)
+    written = store.path.stat().st_mtime_ns
+    for _ in range(3):
+        store.record(client, "first")
+    assert store.path.stat().st_mtime_ns == written
+    assert store.stats == {"solved": 1, "reused": 0}
+
+
+def test_clearance_reuse_counted_once_per_run(tmp_path):
+    store, client = ClearanceStore(tmp_path, "javdb.com"), requests.Session()
+    issue_clearance(client, "first")
+    store.record(client, None)
+
+    later, later_client = ClearanceStore(tmp_path, "javdb.com"), requests.Session()
+    later.load(later_client)
+    assert later.clearance(later_client) == "first"
+    for _ in range(3):
+        later.record(later_client, "first")
+    assert later.stats == {"solved": 1, "reused": 1}
+
+    issue_clearance(later_client, "second")
+    later.record(later_client, "first")
+    assert later.stats == {"solved": 2, "reused": 1}
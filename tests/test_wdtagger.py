@@ -0,0 +1,202 @@
+import json
+import time
+from collections import defaultdict
+from io import BytesIO
+from types import SimpleNamespace
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+
+@pytest.fixture(scope="module")
+def wdtagger(load_scraper):
+    pytest.importorskip("py_common")
+    for name in ("onnxruntime", "PIL", "huggingface_hub"):
+        pytest.importorskip(name)
+    return load_scraper("WdTagger", "gallery", "model", "tagger", "batch")
+
+
+@pytest.fixture
+def gallery(wdtagger):
+    return wdtagger[0]
+
+
+@pytest.fixture
+def model(wdtagger):
+    return wdtagger[1]
+
+
+@pytest.fixture
+def tagger(wdtagger):
+    return wdtagger[2]
+
+
+@pytest.fixture
+def batch(wdtagger):
+    return wdtagger[3]
+
+
+@pytest.mark.parametrize("image_count, count", [(100, 10), (80, 8), (7, 10), (1, 10), (1000, 3)])
+def test_sample_indices_spread_evenly(gallery, image_count, count):
+    indices = gallery.sample_indices(image_count, count)
+    n = min(count, image_count)
+    assert sorted(indices) == [int((i + 0.5) * image_count / n) for i in range(n)]
+
+
+@pytest.mark.parametrize("image_count, count", [(0, 10), (10, 0)])
+def test_sample_indices_empty(gallery, image_count, count):
+    assert gallery.sample_indices(image_count, count) == []
+
+
+def test_sample_indices_prefixes_cover_the_gallery(gallery):
+    """Every power-of-two prefix has one sample per equal part, so early stopping still sees the whole gallery."""
+    indices = gallery.sample_indices(160, 16)
+    for size in (2, 4, 8, 16):
+        assert sorted(i * size // 160 for i in indices[:size]) == list(range(size))
+
+
+def test_iter_previews_keeps_sample_order(gallery, monkeypatch):
+    def download(url: str):
+        time.sleep(0.05 if url == "a" else 0)  # the first preview completes last
+        return None if url == "c" else url.encode()
+
+    monkeypatch.setattr(gallery, "download", download)
+    assert list(gallery.iter_previews(["a", "b", "c", "d"])) == [b"a", b"b", b"d"]
+
+
+def loop_postprocess(names, general, preds, threshold):
+    """The per-image loop `postprocess` replaced."""
+    results = []
+    for probs in preds:
+        indices = np.where(probs > threshold)[0]
+        results.extend((str(names[i]), probs[i]) for i in indices if general[i])
+    tag_sum, tag_count = defaultdict(float), defaultdict(int)
+    for tag, prob in results:
+        tag_sum[tag] += prob
+        tag_count[tag] += 1
+    averaged = [(tag, tag_sum[tag] / tag_count[tag]) for tag in tag_sum]
+    averaged.sort(key=lambda x: x[1], reverse=True)
+    return averaged
+
+
+def tags(model, count: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    return model.Tags(names=np.array([f"tag_{i}" for i in range(count)]), general=rng.random(count) < 0.8)
+
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("images", [1, 2, 3, 8, 16, 32, 64])
+def test_postprocess_matches_loop(model, seed, images):
+    t = tags(model, 10_000, seed)
+    preds = np.random.default_rng(seed + 100).random((images, 10_000), dtype=np.float32)
+
+    expected = loop_postprocess(t.names, t.general, preds, model.PREDICT_THRESHOLD)
+    actual = model.postprocess(t, preds)
+
+    assert actual == [(name, float(prob)) for name, prob in expected]
+
+
+def test_postprocess_ties_keep_first_appearance(model):
+    t = model.Tags(names=np.array(["a", "b", "c", "d"]), general=np.array([True, True, False, True]))
+    preds = np.array([[0.1, 0.9, 0.9, 0.1], [0.1, 0.1, 0.9, 0.9], [0.9, 0.1, 0.1, 0.1]], dtype=np.float32)
+
+    actual = model.postprocess(t, preds)
+
+    assert actual == loop_postprocess(t.names, t.general, preds, model.PREDICT_THRESHOLD)
+    assert [name for name, _ in actual] == ["b", "d", "a"]
+
+
+def test_postprocess_nothing_above_threshold(model):
+    assert model.postprocess(tags(model, 10), np.zeros((2, 10), dtype=np.float32)) == []
+
+
+def test_run_keeps_image_order_with_cached_predictions(tagger, monkeypatch):
+    class Cache:
+        def __init__(self):
+            self.stored = {}
+
+        def get(self, digest):
+            return self.stored.get(digest)
+
+        def put_many(self, items):
+            self.stored.update(items)
+
+    def preprocess_iter(images):
+        batch = [np.full(2, image[0], dtype=np.float32) for image in images]
+        return np.stack(batch) if batch else np.empty((0, 2), dtype=np.float32), 0.0, 0.0
+
+    cache = Cache()
+    monkeypatch.setattr(tagger, "prediction_cache", lambda: cache)
+    monkeypatch.setattr(tagger, "preprocess_iter", preprocess_iter)
+    t = type("Tags", (), {"names": ["x", "y"]})
+    images = [bytes([i]) for i in range(4)]
+
+    tagger.run(images[1:3], t, lambda imgs: imgs)
+    assert len(cache.stored) == 2
+    preds = tagger.run(images, t, lambda imgs: imgs)
+
+    assert preds[:, 0].tolist() == [0, 1, 2, 3]
+
+
+def canvas_preprocess(raw_img: bytes) -> np.ndarray:
+    """The preprocessing `decode` and `place` replaced: full resolution decode, canvas paste and a float copy."""
+    from PIL import Image
+    size = 448
+    img = Image.open(BytesIO(raw_img)).convert("RGB")
+    w, h = img.size
+    scale = min(size / w, size / h)
+    new_w, new_h = int(w * scale), int(h * scale)
+    img = img.resize((new_w, new_h), Image.BICUBIC)
+    canvas = Image.new("RGB", (size, size), (255, 255, 255))
+    canvas.paste(img, ((size - new_w) // 2, (size - new_h) // 2))
+    return np.array(canvas, dtype=np.float32)[..., ::-1]
+
+
+def photo(width: int, height: int, image_format: str) -> bytes:
+    """A noisy gradient standing in for a photo, encoded as JPEG or PNG."""
+    from PIL import Image
+    y, x = np.mgrid[0:height, 0:width]
+    noise = np.random.default_rng(0).integers(0, 32, (height, width, 3))
+    pixels = np.stack([x * 224 // width, y * 224 // height, (x + y) * 224 // (width + height)], axis=-1) + noise
+    buffer = BytesIO()
+    Image.fromarray(pixels.astype(np.uint8)).save(buffer, image_format, quality=90, compress_level=1)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("width, height, image_format", [(1000, 700, "PNG"), (640, 480, "JPEG"), (300, 900, "PNG")])
+def test_preprocess_matches_canvas(model, width, height, image_format):
+    """Sources too small for the reduced decoding give the same pixels."""
+    raw = photo(width, height, image_format)
+    assert np.array_equal(model.preprocess(raw)[0], canvas_preprocess(raw))
+
+
+@pytest.mark.parametrize("image_format", ["PNG", "JPEG"])
+def test_preprocess_close_to_canvas_on_4k(model, image_format):
+    raw = photo(3840, 2160, image_format)
+    diff = np.abs(model.preprocess(raw)[0] - canvas_preprocess(raw))
+    assert diff.max() <= 3 and diff.mean() < 0.25
+
+
+def test_tag_library_retries_galleries_that_failed_to_write(batch, tmp_path, monkeypatch):
+    galleries = [{"id": "1", "image_count": 1, "tags": []}, {"id": "2", "image_count": 1, "tags": []}]
+
+    def call_graphql(query, variables):
+        assert query == batch.GALLERIES_QUERY
+        return {"findGalleries": {"count": 2, "galleries": galleries if variables["after"] == 0 else []}}
+
+    class TagWriter:
+        def write(self, gallery, names):
+            if gallery["id"] == "1":
+                raise RuntimeError("stash is down")
+
+    monkeypatch.setattr(batch, "callGraphQL", call_graphql)
+    monkeypatch.setattr(batch, "Batcher", lambda: SimpleNamespace(tags=None, infer=None))
+    monkeypatch.setattr(batch, "tag_gallery", lambda gallery_id, tags, infer, image_count: ([("cat", 0.9)], 1))
+    monkeypatch.setattr(batch, "TagWriter", TagWriter)
+    checkpoint = tmp_path / "checkpoint.json"
+
+    batch.tag_library(None, True, checkpoint, restart=True)
+
+    state = json.loads(checkpoint.read_text(encoding="utf-8"))
+    assert state == {"last_id": 2, "galleries": 1, "failed": ["1"]}